@@ -15,6 +15,8 @@ OPENFOODFACTS_USER_AGENT = os.getenv("OPENFOODFACTS_USER_AGENT", "PlantBasedInte
 # Default paths
 DEFAULT_PLAYBOOK_PATH = "playbook.json"
 DEFAULT_LOG_PATH = "logs"
+DEFAULT_VISION_CACHE_DIR = os.getenv("VISION_CACHE_DIR", os.path.join("~", ".htf", "vision_cache"))
+VISION_CACHE_TTL_SECONDS = 30 * 86400
 
 
 @dataclass
@@ -6,22 +6,49 @@ Handles:
 2. Normalizing to required plant-based schema
 3. GPT Vision API image analysis for packaging description and improvements
 """
+import io
+import os
+import re
 import json
-import base64
-import urllib.request
-import urllib.parse
+import logging
+import hashlib
+import tempfile
+import threading
+import time
+from pathlib import Path
 from typing import Dict, Any, Optional, List
 from dataclasses import dataclass, field, asdict
 
+# SIMD base64 encoder when available; the stdlib module is API-compatible
+try:
+    import pybase64 as base64
+except ImportError:
+    import base64
+
 from . import config as config_module
-from .config import PLANT_BASED_CATEGORIES
+from .config import PLANT_BASED_CATEGORIES, DEFAULT_VISION_CACHE_DIR, VISION_CACHE_TTL_SECONDS
+from ..utils.json_serializer import json_loads
+
+
+logger = logging.getLogger(__name__)
+
+# Spare bytes reserved ahead of streamed base64 for the "data:<type>;base64,"
+# prefix (e.g. "data:image/svg+xml;base64," is 26 bytes)
+_URI_PREFIX_ROOM = 48
+
+# How much of a download may be buffered while Pillow looks for the image
+# dimensions in its header (JPEG EXIF/ICC blocks can push them back a way)
+_SIZE_PROBE_BYTES = 256 * 1024
+
+# Outermost {...} block in a Vision reply (greedy so nested objects stay whole)
+_JSON_BLOCK_RE = re.compile(r'\{.*\}', re.DOTALL)
 
 
 # =============================================================================
 # NORMALIZED PRODUCT DATA SCHEMA
 # =============================================================================
 
-@dataclass
+@dataclass(slots=True)
 class Nutriments:
     """Normalized nutriments for plant-based analysis."""
     proteins_100g: float = 0.0
@@ -42,7 +69,7 @@ class Nutriments:
         )
 
 
-@dataclass
+@dataclass(slots=True)
 class Packaging:
     """Normalized packaging information."""
     materials: List[str] = field(default_factory=list)
@@ -76,7 +103,7 @@ class Packaging:
         return cls(materials=materials, recyclable=recyclable)
 
 
-@dataclass
+@dataclass(slots=True)
 class NormalizedProductData:
     """
     Normalized product data for plant-based analysis.
@@ -251,7 +278,7 @@ def _normalize_labels(labels_tags: List[str]) -> List[str]:
 # IMAGE ANALYSIS RESULT
 # =============================================================================
 
-@dataclass
+@dataclass(slots=True)
 class ImageAnalysisResult:
     """
     Result from GPT Vision analysis of product packaging.
@@ -294,6 +321,167 @@ class ImageAnalysisResult:
         )
 
 
+# =============================================================================
+# MEDIA TYPE DETECTION
+# =============================================================================
+
+_MAGIC_MEDIA_TYPES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG", "image/png"),
+    (b"GIF8", "image/gif"),
+)
+
+
+def _sniff_media_type(head: bytes, content_type: str = "") -> Optional[str]:
+    """
+    Determine an image's media type from its HTTP header and first bytes.
+    
+    Prefers the server's ``Content-Type`` when it names an image, then the
+    file's magic bytes, then defaults to JPEG. Returns None when the server
+    sent text (typically an HTML error page) that is not an image either.
+    """
+    declared = content_type.split(";", 1)[0].strip().lower()
+    if declared.startswith("image/"):
+        return declared
+    
+    for magic, media_type in _MAGIC_MEDIA_TYPES:
+        if head.startswith(magic):
+            return media_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    
+    if declared.startswith("text/"):
+        return None
+    return "image/jpeg"
+
+
+# =============================================================================
+# VISION RESPONSE CACHE
+# =============================================================================
+
+class VisionCache:
+    """
+    Disk-backed cache of Vision analyses keyed by image content hash.
+    
+    Each entry is a small JSON file named after its key, so lookups never
+    load the whole cache. Entries older than ``ttl_seconds`` are ignored and
+    overwritten on the next successful analysis.
+    
+    Alongside results, the cache remembers each image URL's HTTP validators
+    (ETag / Last-Modified) and content hash, so a re-analysis can use a
+    conditional GET and skip the download entirely on ``304 Not Modified``.
+    """
+    
+    def __init__(self, cache_dir: str = DEFAULT_VISION_CACHE_DIR, ttl_seconds: int = VISION_CACHE_TTL_SECONDS):
+        self.cache_dir = Path(cache_dir).expanduser()
+        self.ttl_seconds = ttl_seconds
+    
+    @staticmethod
+    def make_key(image_digest: str, prompt: str, model: str) -> str:
+        """Hash the exact inputs that determine the Vision response."""
+        digest = hashlib.sha256(image_digest.encode("ascii"))
+        digest.update(prompt.encode("utf-8"))
+        digest.update(model.encode("utf-8"))
+        return digest.hexdigest()
+    
+    def _read(self, path: Path) -> Optional[Dict[str, Any]]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        
+        if time.time() - entry.get("stored_at", 0) > self.ttl_seconds:
+            return None
+        return entry
+    
+    def _write(self, path: Path, payload: Dict[str, Any]):
+        """Atomically write an entry; cache write failures are never fatal.
+        
+        Each write goes through its own temporary file, so concurrent writers
+        of the same key never interleave; the last rename wins.
+        """
+        tmp_path = None
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                "w", encoding="utf-8", dir=path.parent, prefix=f"{path.stem}.", suffix=".tmp", delete=False
+            ) as f:
+                tmp_path = f.name
+                json.dump({"stored_at": time.time(), **payload}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning("Could not write vision cache: %s", e)
+            if tmp_path is not None:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result dict, or None on miss/expiry/corruption."""
+        entry = self._read(self.cache_dir / f"{key}.json")
+        return entry.get("result") if entry else None
+    
+    def set(self, key: str, result: Dict[str, Any]):
+        self._write(self.cache_dir / f"{key}.json", {"result": result})
+    
+    def _url_path(self, url: str) -> Path:
+        return self.cache_dir / "urls" / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json"
+    
+    def get_validators(self, url: str) -> Optional[Dict[str, str]]:
+        """Return ``{"etag", "last_modified", "image_digest"}`` for a URL, if known."""
+        return self._read(self._url_path(url))
+    
+    def set_validators(self, url: str, etag: str, last_modified: str, image_digest: str):
+        self._write(self._url_path(url), {
+            "etag": etag,
+            "last_modified": last_modified,
+            "image_digest": image_digest
+        })
+
+
+# =============================================================================
+# SHARED HTTP SESSION
+# =============================================================================
+
+# One pooled session for OpenFoodFacts lookups and image downloads, so every
+# client in the process shares keep-alive connections and retry policy
+_http_session = None
+
+
+def _get_shared_http_session():
+    """Lazy initialization of the process-wide pooled HTTP session.
+    
+    Importing requests (and ssl with it) is deferred to the first request,
+    so short-lived processes that never go online skip that cost.
+    """
+    global _http_session
+    if _http_session is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=16,
+            # Only transient failures are retried; 404s/auth errors fail fast
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.5,
+                status_forcelist=(408, 429, 500, 502, 503, 504),
+                allowed_methods=frozenset(["GET", "HEAD"]),
+                respect_retry_after_header=True
+            )
+        )
+        session = requests.Session()
+        session.headers.update({"User-Agent": "PlantBasedIntelligence/1.0"})
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _http_session = session
+    return _http_session
+
+
 # =============================================================================
 # OPENFOODFACTS CLIENT
 # =============================================================================
@@ -303,32 +491,37 @@ class OpenFoodFactsClient:
     
     BASE_URL = "https://world.openfoodfacts.org/api/v2"
     
-    def __init__(self, user_agent: str = "PlantBasedIntelligence/1.0"):
+    def __init__(self, user_agent: str = "PlantBasedIntelligence/1.0", session=None):
         self.user_agent = user_agent
+        self._session = session
+        self._headers = {"User-Agent": user_agent}
+    
+    def _get_session(self):
+        """Return the injected session, or the process-wide pooled one."""
+        if self._session is None:
+            self._session = _get_shared_http_session()
+        return self._session
     
     def get_product_by_barcode(self, barcode: str) -> Optional[NormalizedProductData]:
         """Fetch and normalize product data by barcode."""
         url = f"{self.BASE_URL}/product/{barcode}.json"
         
         try:
-            request = urllib.request.Request(
-                url,
-                headers={"User-Agent": self.user_agent}
-            )
-            with urllib.request.urlopen(request, timeout=10) as response:
-                data = json.loads(response.read().decode("utf-8"))
-                
-                if data.get("status") == 1:
-                    return NormalizedProductData.from_openfoodfacts(data)
-                else:
-                    return None
+            response = self._get_session().get(url, headers=self._headers, timeout=10)
+            response.raise_for_status()
+            data = json_loads(response.content)
+            
+            if data.get("status") == 1:
+                return NormalizedProductData.from_openfoodfacts(data)
+            else:
+                return None
         except Exception as e:
-            print(f"Error fetching product {barcode}: {e}")
+            logger.warning("Error fetching product %s: %s", barcode, e)
             return None
     
     def search_plant_based(self, query: str, page: int = 1, page_size: int = 20) -> List[NormalizedProductData]:
         """Search for plant-based products."""
-        params = urllib.parse.urlencode({
+        params = {
             "search_terms": query,
             "tagtype_0": "categories",
             "tag_contains_0": "contains",
@@ -336,20 +529,20 @@ class OpenFoodFactsClient:
             "page": page,
             "page_size": page_size,
             "json": 1
-        })
-        url = f"https://world.openfoodfacts.org/cgi/search.pl?{params}"
+        }
+        url = "https://world.openfoodfacts.org/cgi/search.pl"
         
         try:
-            request = urllib.request.Request(url, headers={"User-Agent": self.user_agent})
-            with urllib.request.urlopen(request, timeout=10) as response:
-                data = json.loads(response.read().decode("utf-8"))
-                
-                products = []
-                for product_data in data.get("products", []):
-                    products.append(NormalizedProductData.from_openfoodfacts({"product": product_data}))
-                return products
+            response = self._get_session().get(url, params=params, headers=self._headers, timeout=10)
+            response.raise_for_status()
+            data = json_loads(response.content)
+            
+            products = []
+            for product_data in data.get("products", []):
+                products.append(NormalizedProductData.from_openfoodfacts({"product": product_data}))
+            return products
         except Exception as e:
-            print(f"Error searching products: {e}")
+            logger.warning("Error searching products: %s", e)
             return []
 
 
@@ -369,18 +562,18 @@ class ImageAnalyzer:
        - Better communicating plant-based value
     """
     
-    VISION_PROMPT = """Tu es un ***expert en amélioration d'images*** de packaging alimentaire.
+    VISION_PROMPT = """Tu es un expert en amélioration d'images de packaging alimentaire.
 
-{{RÈGLES STRICTES}}:
-- ***Aucun conseil générique*** (ex: "améliorer la qualité", "rendre plus pro") sans détail opérationnel.
-- Base-toi ***uniquement*** sur des éléments visibles dans l'image.
-- Si une info manque, dis-le explicitement avec {{[Info manquante]}}.
-- Pour chaque recommandation: précise le ***problème observé***, la ***preuve visuelle***, l'***action exacte***, et le ***résultat attendu***.
-- Ajoute un tag {{[Applicable]}} ou {{[Non applicable]}} selon ce que l'image permet d'affirmer.
+## RÈGLES STRICTES
+- Aucun conseil générique (ex: "améliorer la qualité", "rendre plus pro") sans détail opérationnel.
+- Base-toi uniquement sur des éléments visibles dans l'image.
+- Si une info manque, dis-le explicitement avec [Info manquante].
+- Pour chaque recommandation: précise le problème observé, la preuve visuelle, l'action exacte et le résultat attendu.
+- Ajoute un tag [Applicable] ou [Non applicable] selon ce que l'image permet d'affirmer.
 
-{{ANALYSE REQUISE}}:
+## ANALYSE REQUISE
 
-***1. OBSERVATIONS*** (bullets détaillées):
+### 1. OBSERVATIONS (bullets détaillées)
 - Style visuel et qualité du design (police, hiérarchie, alignement)
 - Palette de couleurs et harmonie chromatique
 - Claims et certifications visibles (bio, vegan, etc.)
@@ -389,25 +582,17 @@ class ImageAnalyzer:
 - Présence en rayon et impact visuel
 - Matériaux d'emballage visibles
 
-***2. PROBLÈMES DÉTECTÉS*** (avec indices visuels):
+### 2. PROBLÈMES DÉTECTÉS (avec indices visuels)
 - Chaque problème doit citer un élément visible précis
 - Évaluer l'impact sur: attractivité, perception ultra-transformé, greenwashing
 - Prioriser par gravité (Critique / Important / Mineur)
 
-***3. RECOMMANDATIONS ACTIONNABLES***:
-Pour chaque recommandation fournir:
-- {{Problème}}: Description précise du problème observé
-- {{Preuve visuelle}}: Élément visible qui justifie ce constat
-- {{Action exacte}}: Modification spécifique à effectuer (outils/paramètres si possible)
-- {{Résultat attendu}}: Bénéfice concret pour le consommateur/la marque
-- {{Applicabilité}}: [Applicable] ou [Non applicable]
+### 3. RECOMMANDATIONS ACTIONNABLES
+Pour chaque recommandation: problème, preuve visuelle, action exacte (outils/paramètres si possible), résultat attendu, applicabilité.
 
-{{FORMAT DE SORTIE JSON}}:
+## FORMAT DE SORTIE JSON
 {
-  "observations": [
-    "observation détaillée 1 avec élément visuel cité",
-    "observation détaillée 2 avec élément visuel cité"
-  ],
+  "observations": ["observation détaillée avec élément visuel cité"],
   "problemes_detectes": [
     {
       "probleme": "description du problème",
@@ -428,28 +613,91 @@ Pour chaque recommandation fournir:
   ]
 }
 
-***IMPORTANT***: Ne jamais inventer d'éléments non visibles. Rester factuel et actionnable."""
+IMPORTANT: Ne jamais inventer d'éléments non visibles. Rester factuel et actionnable."""
 
-    def __init__(self, api_key: str = None, model: str = "gpt-4o"):
+    # OpenAI clients keyed by API key, so analyzers sharing a key also share
+    # the client's keep-alive connections to the API
+    _clients: Dict[str, Any] = {}
+    # Hosts contacted on nearly every analysis, resolved once per process
+    _PREFETCH_HOSTS = ("images.openfoodfacts.org", "api.openai.com")
+    _dns_primed = False
+    
+    def __init__(
+        self,
+        api_key: str = None,
+        model: str = "gpt-4o",
+        cache: Optional[VisionCache] = None,
+        temperature: float = 0.0,
+        session=None
+    ):
         self.api_key = api_key
+        # Image downloads default to the process-wide pooled session
+        self._http_session = session
         self.model = model
+        self.temperature = temperature
         self._client = None
+        self.cache = cache if cache is not None else VisionCache()
+        self.stats = {"hits": 0, "misses": 0}
+        # analyze_many runs analyses on worker threads
+        self._stats_lock = threading.Lock()
+        # Immutable system message, shared by every request (the client only
+        # reads it). Keeping the prompt as a stable prefix lets OpenAI's
+        # prompt cache discount it on repeated calls.
+        self._system_message = {"role": "system", "content": self.VISION_PROMPT}
+        
+        # Warm-start the shared client so the first analysis doesn't pay for it
+        if self.api_key:
+            self._prime_dns()
+            try:
+                self._get_client()
+            except ImportError:
+                pass
+    
+    @staticmethod
+    def _prime_dns():
+        """Resolve the image and API hosts in the background to warm the resolver cache."""
+        if ImageAnalyzer._dns_primed:
+            return
+        ImageAnalyzer._dns_primed = True
+        
+        import socket
+        
+        def resolve():
+            for host in ImageAnalyzer._PREFETCH_HOSTS:
+                try:
+                    socket.getaddrinfo(host, 443, proto=socket.IPPROTO_TCP)
+                except OSError:
+                    pass  # Best effort: the real request will surface DNS errors
+        
+        threading.Thread(target=resolve, name="vision-dns-prefetch", daemon=True).start()
+    
+    def _get_http_session(self):
+        """Return the injected image download session, or the shared one."""
+        if self._http_session is None:
+            self._http_session = _get_shared_http_session()
+        return self._http_session
     
     def _get_client(self):
-        """Lazy initialization of OpenAI client."""
+        """Return the OpenAI client shared by all analyzers using this API key."""
         if self._client is None:
-            try:
-                import openai
-                self._client = openai.OpenAI(api_key=self.api_key)
-            except ImportError:
-                raise ImportError("openai package required for image analysis")
+            client = ImageAnalyzer._clients.get(self.api_key)
+            if client is None:
+                try:
+                    import openai
+                except ImportError:
+                    raise ImportError("openai package required for image analysis")
+                client = ImageAnalyzer._clients.setdefault(self.api_key, openai.OpenAI(api_key=self.api_key))
+            self._client = client
         return self._client
     
-    def analyze_from_url(self, image_url: str) -> ImageAnalysisResult:
+    def analyze_from_url(self, image_url: str, bypass_cache: bool = False) -> ImageAnalysisResult:
         """Analyze packaging image from URL using GPT Vision.
         
         Downloads the image locally first, then sends it as base64 to avoid
         OpenAI Vision API timeout issues when downloading from external URLs.
+        Results are cached by image content hash; pass ``bypass_cache=True``
+        to force a fresh Vision call (the new result still refreshes the cache).
+        Sampling analyzers (``temperature > 0``) never read or write the cache.
         """
         if not image_url:
             return ImageAnalysisResult.empty()
@@ -462,81 +710,280 @@ Pour chaque recommandation fournir:
             )
         
         try:
+            # If we already analyzed this URL, revalidate instead of re-downloading
+            headers = {}
+            known = None if bypass_cache else self.cache.get_validators(image_url)
+            known_key = self._cache_key(known["image_digest"]) if known else None
+            if known_key is not None:
+                if self.cache.get(known_key) is not None:
+                    if known.get("etag"):
+                        headers["If-None-Match"] = known["etag"]
+                    if known.get("last_modified"):
+                        headers["If-Modified-Since"] = known["last_modified"]
+            
             # Download image locally first to avoid Vision API timeout
-            print(f"   Downloading image from {image_url}...")
-            request = urllib.request.Request(
-                image_url,
-                headers={"User-Agent": "PlantBasedIntelligence/1.0"}
-            )
+            logger.debug("Downloading image from %s", image_url)
             
-            # Download with timeout and retry logic
-            max_retries = 3
-            retry_delay = 2
-            image_data = None
+            # Retries with backoff are handled by the session's HTTPAdapter
+            session = self._get_http_session()
+            response = session.get(image_url, headers=headers, timeout=30, stream=True)
             
-            for attempt in range(max_retries):
-                try:
-                    with urllib.request.urlopen(request, timeout=30) as response:
-                        image_data = response.read()
-                        break
-                except Exception as download_error:
-                    if attempt < max_retries - 1:
-                        print(f"   Download attempt {attempt + 1} failed, retrying in {retry_delay}s...")
-                        import time
-                        time.sleep(retry_delay)
-                    else:
-                        raise download_error
+            if response.status_code == 304 and headers:
+                response.close()
+                cached = self.cache.get(known_key)
+                if cached is not None:
+                    self._count("hits")
+                    logger.debug("Image not modified, reusing cached Vision analysis for %s", image_url)
+                    return ImageAnalysisResult.from_dict(cached)
+                # Entry expired between the check and now: fetch unconditionally
+                response = session.get(image_url, timeout=30, stream=True)
             
-            if not image_data:
+            with response:
+                response.raise_for_status()
+                encoded, encoded_end, image_digest, image_size, image_head, raw = self._stream_base64(
+                    response, max_side=self.VISION_MAX_SIDE
+                )
+            
+            if not image_size:
                 raise Exception("Failed to download image after retries")
             
-            # Encode to base64
-            image_base64 = base64.b64encode(image_data).decode('utf-8')
+            media_type = _sniff_media_type(image_head, response.headers.get("Content-Type", ""))
+            if media_type is None:
+                raise Exception("URL did not return an image (got a text/HTML response)")
+            
+            etag = response.headers.get("ETag", "")
+            last_modified = response.headers.get("Last-Modified", "")
+            if etag or last_modified:
+                self.cache.set_validators(image_url, etag, last_modified, image_digest)
+            
+            cache_key = self._cache_key(image_digest)
+            if cache_key is not None and not bypass_cache:
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    self._count("hits")
+                    logger.debug("Vision cache hit for %s, skipping Vision API call", image_url)
+                    return ImageAnalysisResult.from_dict(cached)
+            self._count("misses")
             
-            # Determine media type from URL
-            media_type = "image/jpeg"
-            if image_url.lower().endswith('.png'):
-                media_type = "image/png"
-            elif image_url.lower().endswith('.webp'):
-                media_type = "image/webp"
+            if raw is not None:
+                # Oversized: collected raw during the download, sent downscaled
+                resized = self._downscale_for_vision(raw, self.VISION_MAX_SIDE)
+                if resized is not None:
+                    media_type, raw = resized
+                data_uri = f"data:{media_type};base64,{base64.b64encode(raw).decode('ascii')}"
+            else:
+                data_uri = self._finish_data_uri(encoded, encoded_end, media_type)
+            del encoded, raw
             
-            print(f"   Image downloaded successfully ({len(image_data)} bytes), sending to Vision API...")
+            logger.debug("Image downloaded (%d bytes), sending to Vision API", image_size)
             
             # Now send to Vision API as base64
             client = self._get_client()
             
             response = client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": self.VISION_PROMPT},
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:{media_type};base64,{image_base64}"
-                                }
-                            }
-                        ]
-                    }
-                ],
-                max_tokens=1000
+                messages=self._build_messages(data_uri),
+                max_tokens=1000,
+                temperature=self.temperature,
+                response_format={"type": "json_object"}
             )
             
             content = response.choices[0].message.content
             
             # Parse JSON from response
-            return self._parse_vision_response(content)
+            result = self._parse_vision_response(content)
+            
+            # Only cache structured analyses, not free-text fallbacks/refusals
+            if cache_key is not None and (
+                result.observations or result.problemes_detectes or result.attractiveness_improvements
+            ):
+                self.cache.set(cache_key, result.to_dict())
+            
+            return result
             
         except Exception as e:
-            print(f"Vision API error: {e}")
-            print(f"   Continuing without image analysis...")
+            logger.exception("Vision API error, continuing without image analysis")
             return ImageAnalysisResult(
                 image_description=f"Image analysis failed: {str(e)}",
                 attractiveness_improvements=[]
             )
     
+    def _count(self, stat: str):
+        with self._stats_lock:
+            self.stats[stat] += 1
+    
+    def _cache_key(self, image_digest: str) -> Optional[str]:
+        """Vision cache key for an image, or None when results are non-deterministic."""
+        if self.temperature > 0:
+            return None
+        return VisionCache.make_key(image_digest, self.VISION_PROMPT, self.model)
+    
+    def _build_messages(self, data_uri: str) -> List[Dict[str, Any]]:
+        """Build the Vision chat messages: shared system prompt, then the image."""
+        return [
+            self._system_message,
+            {"role": "user", "content": [{"type": "image_url", "image_url": {"url": data_uri}}]}
+        ]
+    
+    # Vision tiles images down to at most 2048px anyway, so larger originals
+    # are shrunk to this before upload
+    VISION_MAX_SIDE = 1536
+    
+    @staticmethod
+    def _image_dimensions(data) -> Optional[tuple]:
+        """(width, height) from an image's header, or None if not (yet) readable."""
+        from PIL import Image
+        
+        try:
+            # Image.open is lazy: it parses the header, not the pixel data
+            with Image.open(io.BytesIO(data)) as img:
+                return img.size
+        except Exception:
+            return None
+    
+    @staticmethod
+    def _downscale_for_vision(raw: bytes, max_side: int) -> Optional[tuple]:
+        """
+        Shrink an oversized image to Vision's working resolution.
+        
+        Returns ``(media_type, image_bytes)``, or None when the original
+        should be sent unchanged (undecodable). Images with transparency are
+        written as PNG so the alpha channel survives; everything else as JPEG.
+        """
+        from PIL import Image
+        
+        try:
+            with Image.open(io.BytesIO(raw)) as img:
+                img.thumbnail((max_side, max_side), Image.LANCZOS)
+                out = io.BytesIO()
+                if img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info:
+                    img.save(out, format="PNG", optimize=True)
+                    return "image/png", out.getvalue()
+                if img.mode not in ("RGB", "L"):
+                    img = img.convert("RGB")
+                img.save(out, format="JPEG", quality=85, optimize=True)
+                return "image/jpeg", out.getvalue()
+        except Exception as e:
+            logger.warning("Could not downscale image, sending original: %s", e)
+            return None
+    
+    @staticmethod
+    def _stream_base64(response, max_side: Optional[int] = None, chunk_size: int = 3 * 64 * 1024):
+        """Base64-encode a streamed download straight into the upload buffer.
+        
+        The encoded bytes are written into one bytearray, presized from
+        Content-Length when the server sends it, starting after
+        ``_URI_PREFIX_ROOM`` spare bytes where ``_finish_data_uri`` later
+        writes the ``data:...;base64,`` prefix. The raw image is never held
+        whole, and the data URI needs no further concatenation. Chunks are
+        re-aligned to multiples of 3 bytes so no padding is emitted
+        mid-stream.
+        
+        With ``max_side`` (and Pillow installed), the first bytes are held
+        back until the image dimensions can be read from its header. An
+        image larger than ``max_side`` on either side is then collected raw
+        instead, since it is re-encoded after downscaling anyway.
+        
+        Returns ``(buffer, end, sha256_hex, byte_count, head, raw)``: the
+        payload is ``buffer[_URI_PREFIX_ROOM:end]``, ``head`` holds the first
+        bytes for media-type sniffing, and ``raw`` is the whole image for
+        oversized downloads (None otherwise, and the buffer is then unused).
+        """
+        if max_side is not None:
+            try:
+                import PIL  # noqa: F401
+            except ImportError:
+                max_side = None
+        
+        try:
+            expected = int(response.headers.get("Content-Length") or 0)
+        except ValueError:
+            expected = 0
+        buffer = bytearray(_URI_PREFIX_ROOM + (expected + 2) // 3 * 4)
+        pos = _URI_PREFIX_ROOM
+        
+        digest = hashlib.sha256()
+        pending = b""
+        head = b""
+        size = 0
+        # Bytes held back until the dimensions are known; None once decided
+        probe = bytearray() if max_side is not None else None
+        raw = None
+        
+        def write(data: bytes):
+            nonlocal pos
+            # Overwrites the presized region; grows the buffer if the hint was short
+            buffer[pos:pos + len(data)] = data
+            pos += len(data)
+        
+        def encode(data: bytes):
+            nonlocal pending
+            pending += data
+            aligned = len(pending) - len(pending) % 3
+            write(base64.b64encode(pending[:aligned]))
+            pending = pending[aligned:]
+        
+        def decide(final: bool):
+            nonlocal probe, raw
+            dimensions = ImageAnalyzer._image_dimensions(probe)
+            if dimensions is None and not final and len(probe) < _SIZE_PROBE_BYTES:
+                return
+            if dimensions is not None and max(dimensions) > max_side:
+                raw = probe
+            else:
+                encode(bytes(probe))
+            probe = None
+        
+        for chunk in response.iter_content(chunk_size):
+            digest.update(chunk)
+            size += len(chunk)
+            if len(head) < 12:
+                head += chunk[:12 - len(head)]
+            if raw is not None:
+                raw += chunk
+            elif probe is not None:
+                probe += chunk
+                decide(final=False)
+            else:
+                encode(chunk)
+        if probe is not None:
+            decide(final=True)
+        if raw is not None:
+            return buffer, pos, digest.hexdigest(), size, head, bytes(raw)
+        write(base64.b64encode(pending))
+        
+        return buffer, pos, digest.hexdigest(), size, head, None
+    
+    @staticmethod
+    def _finish_data_uri(buffer: bytearray, end: int, media_type: str) -> str:
+        """Write the data-URI prefix into the reserved room and decode once."""
+        prefix = f"data:{media_type};base64,"
+        with memoryview(buffer) as view:
+            if len(prefix) > _URI_PREFIX_ROOM:
+                # Unusually long media type: fall back to one extra copy
+                return prefix + str(view[_URI_PREFIX_ROOM:end], "ascii")
+            start = _URI_PREFIX_ROOM - len(prefix)
+            view[start:_URI_PREFIX_ROOM] = prefix.encode("ascii")
+            return str(view[start:end], "ascii")
+    
+    async def analyze_many(self, urls: List[str], concurrency: int = 8) -> List[ImageAnalysisResult]:
+        """Analyze several packaging images concurrently.
+        
+        Downloads and Vision calls are I/O-bound, so running them side by side
+        brings batch wall time close to the slowest single image instead of
+        the sum. Each URL goes through ``analyze_from_url`` on a worker thread,
+        sharing its pooled session and Vision cache. Results keep input order.
+        """
+        import asyncio
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def analyze_one(url: str) -> ImageAnalysisResult:
+            async with semaphore:
+                return await asyncio.to_thread(self.analyze_from_url, url)
+        
+        return list(await asyncio.gather(*(analyze_one(url) for url in urls)))
+    
     def analyze_from_base64(self, image_data: str, media_type: str = "image/jpeg") -> ImageAnalysisResult:
         """Analyze packaging image from base64 data."""
         if not self.api_key:
@@ -547,28 +994,17 @@ Pour chaque recommandation fournir:
             
             response = client.chat.completions.create(
                 model=self.model,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [
-                            {"type": "text", "text": self.VISION_PROMPT},
-                            {
-                                "type": "image_url",
-                                "image_url": {
-                                    "url": f"data:{media_type};base64,{image_data}"
-                                }
-                            }
-                        ]
-                    }
-                ],
-                max_tokens=1000
+                messages=self._build_messages(f"data:{media_type};base64,{image_data}"),
+                max_tokens=1000,
+                temperature=self.temperature,
+                response_format={"type": "json_object"}
             )
             
             content = response.choices[0].message.content
             return self._parse_vision_response(content)
             
         except Exception as e:
-            print(f"Vision API error: {e}")
+            logger.exception("Vision API error")
             return ImageAnalysisResult(
                 image_description=f"Image analysis failed: {str(e)}",
                 attractiveness_improvements=[]
@@ -576,21 +1012,27 @@ Pour chaque recommandation fournir:
     
     def _parse_vision_response(self, content: str) -> ImageAnalysisResult:
         """Parse GPT Vision response into structured result with enhanced format."""
-        import re
+        data = None
         
-        # Try to extract JSON
-        json_match = re.search(r'\{[\s\S]*\}', content)
-        if json_match:
-            try:
-                data = json.loads(json_match.group())
-                return ImageAnalysisResult(
-                    image_description=data.get("image_description", ""),
-                    observations=data.get("observations", []),
-                    problemes_detectes=data.get("problemes_detectes", []),
-                    attractiveness_improvements=data.get("attractiveness_improvements", [])
-                )
-            except json.JSONDecodeError:
-                pass
+        # JSON mode returns a bare object; only scan for an embedded block
+        # when a provider ignored response_format and wrapped it in prose
+        try:
+            data = json_loads(content)
+        except json.JSONDecodeError:
+            json_match = _JSON_BLOCK_RE.search(content)
+            if json_match:
+                try:
+                    data = json_loads(json_match.group())
+                except json.JSONDecodeError:
+                    pass
+        
+        if isinstance(data, dict):
+            return ImageAnalysisResult(
+                image_description=data.get("image_description", ""),
+                observations=data.get("observations", []),
+                problemes_detectes=data.get("problemes_detectes", []),
+                attractiveness_improvements=data.get("attractiveness_improvements", [])
+            )
         
         # Fallback: use content as description
         return ImageAnalysisResult(
@@ -4,6 +4,13 @@ Prompt templates for the ACE Product Intelligence agents.
 Contains system prompts for Generator, Reflector, and Curator
 adapted to the Product Intelligence & Marketing Analysis domain.
 """
+from ..utils.json_serializer import dumps_indented
+
+
+def _dumps_indented(data) -> str:
+    """Pretty-print data as JSON for prompt embedding."""
+    return dumps_indented(data).decode("utf-8")
+
 
 # =============================================================================
 # GENERATOR PROMPT - Product Intelligence Analysis
@@ -62,17 +69,15 @@ def format_generator_user_message(
     business_objective: str
 ) -> str:
     """Format the user message for the Generator."""
-    import json
-    
     return f"""PLAYBOOK_BEGIN
 {playbook_text}
 PLAYBOOK_END
 
 PRODUCT_DATA:
-{json.dumps(product_data, indent=2, ensure_ascii=False)}
+{_dumps_indented(product_data)}
 
 IMAGE_ANALYSIS:
-{json.dumps(image_analysis, indent=2, ensure_ascii=False)}
+{_dumps_indented(image_analysis)}
 
 BUSINESS_OBJECTIVE:
 {business_objective}
@@ -140,12 +145,10 @@ def format_reflector_user_message(
     feedback: str = None
 ) -> str:
     """Format the user message for the Reflector."""
-    import json
-    
     parts = [
         f"USER_OBJECTIVE:\n{business_objective}",
-        f"\nPRODUCT_DATA:\n{json.dumps(product_data, indent=2, ensure_ascii=False)}",
-        f"\nGENERATOR_OUTPUT:\n{json.dumps(generator_output, indent=2, ensure_ascii=False)}",
+        f"\nPRODUCT_DATA:\n{_dumps_indented(product_data)}",
+        f"\nGENERATOR_OUTPUT:\n{_dumps_indented(generator_output)}",
         f"\nCURRENT_PLAYBOOK:\n{playbook_text}"
     ]
     
@@ -215,16 +218,14 @@ def format_curator_user_message(
     playbook_text: str
 ) -> str:
     """Format the user message for the Curator."""
-    import json
-    
     return f"""ORIGINAL_OBJECTIVE:
 {business_objective}
 
 GENERATOR_OUTPUT:
-{json.dumps(generator_output, indent=2, ensure_ascii=False)}
+{_dumps_indented(generator_output)}
 
 REFLECTOR_OUTPUT:
-{json.dumps(reflector_output, indent=2, ensure_ascii=False)}
+{_dumps_indented(reflector_output)}
 
 CURRENT_PLAYBOOK:
 {playbook_text}
@@ -236,6 +237,10 @@ Determine what new knowledge should be added to the playbook."""
 # HELPER FUNCTIONS
 # =============================================================================
 
+# The empty responses below are built from literals on purpose: callers own
+# and mutate the returned dicts, and a fresh literal is far cheaper than
+# deep-copying a shared frozen template (~20x in CPython 3.11).
+
 def get_empty_generator_response() -> dict:
     """Return an empty generator response structure."""
     return {
@@ -3,7 +3,193 @@ Research Insights Generator for ACE Pipeline
 Generates research-based insights for plant-based products
 """
 
-from typing import Dict, Any, List
+import sys
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Dict, Any, List, Optional, Tuple
+
+from ..utils.json_serializer import dumps_compact
+
+try:
+    import numpy as np  # installed alongside pandas; only used for batches
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+
+# Tier labels repeated throughout every result, interned once so all records
+# and lookups share the same string objects
+_HIGH, _MEDIUM, _LOW, _CRITICAL, _MODERATE, _GOOD, _MEDIUM_HIGH = map(
+    sys.intern, ("High", "Medium", "Low", "Critical", "Moderate", "Good", "Medium-High")
+)
+
+
+# Read-only stand-in for a missing nested section, so lookups on the miss path
+# don't allocate a fresh {} each time
+_NO_VALUES = MappingProxyType({})
+
+
+# =============================================================================
+# STATIC INSIGHT RECORDS
+# =============================================================================
+# These records never depend on the inputs, so they are built once and shared
+# by every internally built result instead of being re-created per call. The
+# public generators hand out private copies (see _copy_tree), so callers may
+# modify what they get back.
+
+_BASE_CONSUMER_TRENDS = (
+    {
+        "trend": "Flexitarian Movement Growth",
+        "description": "Increasing number of consumers reducing meat consumption without fully eliminating it",
+        "impact": _HIGH,
+        "relevance": "Expands addressable market beyond vegans and vegetarians",
+        "source": "Market research 2024"
+    },
+    {
+        "trend": "Health-Conscious Consumption",
+        "description": "Consumers prioritizing nutritional value and clean ingredients in plant-based products",
+        "impact": _HIGH,
+        "relevance": "Drives demand for high-protein, low-processed alternatives",
+        "source": "Consumer surveys 2024"
+    },
+    {
+        "trend": "Sustainability Awareness",
+        "description": "Growing concern about environmental impact of food choices",
+        "impact": _MEDIUM_HIGH,
+        "relevance": "Plant-based products positioned as eco-friendly alternatives",
+        "source": "Environmental studies 2024"
+    }
+)
+
+_TASTE_PARITY_TREND = {
+    "trend": "Taste Parity Expectations",
+    "description": "Consumers expect plant-based meat to match or exceed traditional meat taste",
+    "impact": _CRITICAL,
+    "relevance": "Product success depends on sensory experience",
+    "source": "Taste tests 2024"
+}
+
+_PREMIUM_SEGMENT_TREND = {
+    "trend": "Premium Plant-Based Segment",
+    "description": "Willingness to pay premium for superior quality and sustainability",
+    "impact": _MEDIUM,
+    "relevance": "Supports premium pricing strategy",
+    "source": "Market segmentation 2024"
+}
+
+_MARKET_SIZE = {
+    "description": "The plant-based meat market is experiencing rapid growth",
+    "growth_rate": "15-20% CAGR (2024-2028)",
+    "market_value": "€4.5B in Europe (2024)",
+    "projection": "Expected to reach €8B by 2028"
+}
+
+_MARKET_LEADERS = ["Beyond Meat", "Impossible Foods", "Quorn"]
+
+_DISTRIBUTION_CHANNELS = {
+    "retail": "70% - Supermarkets and specialty stores",
+    "foodservice": "20% - Restaurants and catering",
+    "direct_to_consumer": "10% - Online and subscriptions",
+    "trend": "E-commerce growing rapidly"
+}
+
+_WATER_USAGE = {
+    "plant_based": "75-90% less than beef",
+    "importance": "Critical in water-scarce regions"
+}
+
+_LAND_USE = {
+    "plant_based": "95% less land than beef",
+    "impact": "Enables more efficient food production"
+}
+
+_SUPPLY_CHAIN = {
+    "sourcing": "Local sourcing reduces carbon footprint",
+    "transparency": "Consumers value supply chain transparency",
+    "certifications": "Organic, Fair Trade, B-Corp add credibility"
+}
+
+_SUSTAINABILITY_PERCEPTION = {
+    "awareness": "High - 70% of consumers aware of environmental benefits",
+    "purchase_driver": "Sustainability is top 3 reason for choosing plant-based",
+    "communication": "Clear environmental messaging increases purchase intent"
+}
+
+_PACKAGING_DESIGN_OPPORTUNITY = {
+    "area": "Packaging Design",
+    "opportunity": "Enhance visual appeal and shelf presence",
+    "rationale": "Current attractiveness score suggests room for improvement",
+    "potential_impact": "High - First impression drives trial",
+    "examples": "Premium finishes, transparent windows, bold colors"
+}
+
+_NUTRITIONAL_ENHANCEMENT_OPPORTUNITY = {
+    "area": "Nutritional Enhancement",
+    "opportunity": "Fortify with vitamins B12, iron, and omega-3",
+    "rationale": "Address common nutritional gaps in plant-based diets",
+    "potential_impact": "Medium-High - Differentiates from competitors",
+    "examples": "Added B12, iron from legumes, algae-based omega-3"
+}
+
+_UNIVERSAL_OPPORTUNITIES = (
+    {
+        "area": "Taste Innovation",
+        "opportunity": "Develop next-generation flavor profiles",
+        "rationale": "Taste remains #1 barrier to plant-based adoption",
+        "potential_impact": "Critical - Drives repeat purchase",
+        "examples": "Fermentation, fat marbling, umami enhancement"
+    },
+    {
+        "area": "Texture Technology",
+        "opportunity": "Improve mouthfeel and juiciness",
+        "rationale": "Texture is key differentiator from traditional meat",
+        "potential_impact": "High - Enhances eating experience",
+        "examples": "3D printing, extrusion technology, fat encapsulation"
+    },
+    {
+        "area": "Clean Label",
+        "opportunity": "Reduce additives and simplify ingredient list",
+        "rationale": "Consumer demand for recognizable ingredients",
+        "potential_impact": "Medium - Appeals to health-conscious segment",
+        "examples": "Natural binders, vegetable-based colors, minimal processing"
+    }
+)
+
+_ARTISANAL_OPPORTUNITY = {
+    "area": "Artisanal Production",
+    "opportunity": "Small-batch, craft positioning",
+    "rationale": "Premium consumers value authenticity and craftsmanship",
+    "potential_impact": "Medium - Justifies premium pricing",
+    "examples": "Hand-crafted, locally sourced, chef-developed"
+}
+
+_CONSUMER_FINDING = (
+    "Consumer acceptance of plant-based products is growing rapidly, "
+    "with flexitarians representing the largest addressable market segment"
+)
+
+_STRONG_READINESS_FINDING = (
+    "Product demonstrates strong market readiness with high scores across "
+    "attractiveness, utility, and positioning dimensions"
+)
+
+_IMPROVEMENT_FINDING = (
+    "Product has improvement opportunities in key areas that could enhance "
+    "market performance and consumer acceptance"
+)
+
+_SUSTAINABILITY_FINDING = (
+    "Environmental benefits remain a key purchase driver, with plant-based products "
+    "offering 90% reduction in CO2 emissions compared to traditional meat"
+)
+
+_INNOVATION_FINDING = (
+    "Continuous innovation in taste, texture, and nutrition is critical for "
+    "maintaining competitive advantage in the rapidly evolving market"
+)
 
 
 def generate_research_insights(
@@ -22,21 +208,296 @@ def generate_research_insights(
         marketing_strategy: Marketing strategy recommendations
         
     Returns:
-        Dictionary with research insights
+        Dictionary with research insights, private to the caller
+    """
+    return _copy_tree(
+        _shared_research_insights(product_data, scoring_results, competitor_intelligence, marketing_strategy)
+    )
+
+
+def _copy_tree(data: Any) -> Any:
+    """
+    Copy the dicts and lists of an insights tree; leaves are immutable.
+    
+    A cheaper stand-in for copy.deepcopy on the JSON-shaped results, which
+    share their static records and (when memoized) the whole tree.
+    """
+    if isinstance(data, dict):
+        return {key: _copy_tree(value) for key, value in data.items()}
+    if isinstance(data, list):
+        return [_copy_tree(value) for value in data]
+    return data
+
+
+def _shared_research_insights(
+    product_data: Dict[str, Any],
+    scoring_results: Dict[str, Any],
+    competitor_intelligence: Dict[str, Any],
+    marketing_strategy: Dict[str, Any]
+) -> Dict[str, Any]:
+    """generate_research_insights without the copy: memoized and shared, never modify it."""
+    if not (product_data or scoring_results or competitor_intelligence or marketing_strategy):
+        return _EMPTY_INSIGHTS
+    
+    key = _insights_cache_key(product_data, scoring_results, competitor_intelligence, marketing_strategy)
+    if key is not None:
+        with _INSIGHTS_CACHE_LOCK:
+            cached = _INSIGHTS_CACHE.get(key)
+            if cached is not None:
+                _INSIGHTS_CACHE.move_to_end(key)
+                return cached
+    
+    result = _build_research_insights(product_data, scoring_results, competitor_intelligence, marketing_strategy)
+    
+    if key is not None:
+        with _INSIGHTS_CACHE_LOCK:
+            _INSIGHTS_CACHE[key] = result
+            if len(_INSIGHTS_CACHE) > _INSIGHTS_CACHE_SIZE:
+                _INSIGHTS_CACHE.popitem(last=False)
+    return result
+
+
+def research_insights_json(
+    product_data: Dict[str, Any],
+    scoring_results: Dict[str, Any],
+    competitor_intelligence: Dict[str, Any],
+    marketing_strategy: Dict[str, Any]
+) -> bytes:
+    """
+    Generate research insights already serialized as compact UTF-8 JSON.
+    
+    Takes the same arguments as generate_research_insights. Serialized bytes
+    are memoized alongside the result cache (and precomputed for empty
+    inputs), so repeated responses skip re-encoding the whole tree.
+    """
+    if not (product_data or scoring_results or competitor_intelligence or marketing_strategy):
+        return _EMPTY_INSIGHTS_JSON
+    
+    key = _insights_cache_key(product_data, scoring_results, competitor_intelligence, marketing_strategy)
+    if key is not None:
+        with _INSIGHTS_CACHE_LOCK:
+            cached = _INSIGHTS_JSON_CACHE.get(key)
+            if cached is not None:
+                _INSIGHTS_JSON_CACHE.move_to_end(key)
+                return cached
+    
+    encoded = dumps_compact(
+        _shared_research_insights(product_data, scoring_results, competitor_intelligence, marketing_strategy)
+    )
+    
+    if key is not None:
+        with _INSIGHTS_CACHE_LOCK:
+            _INSIGHTS_JSON_CACHE[key] = encoded
+            if len(_INSIGHTS_JSON_CACHE) > _INSIGHTS_CACHE_SIZE:
+                _INSIGHTS_JSON_CACHE.popitem(last=False)
+    return encoded
+
+
+def generate_research_insights_batch(items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Generate research insights for many products at once.
+    
+    Args:
+        items: One dict per product with any of the keys product_data,
+            scoring_results, competitor_intelligence and marketing_strategy
+            (missing keys default to empty dicts)
+        
+    Returns:
+        List of research insight dictionaries, in input order. Equivalent to
+        calling generate_research_insights on each item.
+    """
+    inputs = [
+        (
+            item.get("product_data") or {},
+            item.get("scoring_results") or {},
+            item.get("competitor_intelligence") or {},
+            item.get("marketing_strategy") or {},
+        )
+        for item in items
+    ]
+    codes = _classify_nutrients_batch([args[0] for args in inputs])
+    
+    return [
+        _copy_tree(_build_research_insights(*args, nutrient_codes=item_codes) if any(args) else _EMPTY_INSIGHTS)
+        for args, item_codes in zip(inputs, codes)
+    ]
+
+
+# Persistent pools for generate_research_insights_parallel, one per worker count
+_EXECUTORS: Dict[int, ThreadPoolExecutor] = {}
+_EXECUTORS_LOCK = threading.Lock()
+
+
+def generate_research_insights_parallel(items: List[Dict[str, Any]], workers: int = 8) -> List[Dict[str, Any]]:
+    """
+    Generate research insights for many products on a shared thread pool.
+    
+    Each product is handled by one worker; sections within a product are
+    not split across threads since the GIL makes that a loss. This mainly
+    helps when items are produced by I/O-bound upstream steps, in which case
+    workers should roughly match the CPU count.
+    
+    Args:
+        items: Same shape as for generate_research_insights_batch
+        workers: Pool size (pools are created once per size and reused)
+        
+    Returns:
+        List of research insight dictionaries, in input order
+    """
+    with _EXECUTORS_LOCK:
+        executor = _EXECUTORS.get(workers)
+        if executor is None:
+            executor = _EXECUTORS[workers] = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="research-insights"
+            )
+    
+    return list(executor.map(_generate_item_insights, items))
+
+
+def _generate_item_insights(item: Dict[str, Any]) -> Dict[str, Any]:
+    return generate_research_insights(
+        item.get("product_data") or {},
+        item.get("scoring_results") or {},
+        item.get("competitor_intelligence") or {},
+        item.get("marketing_strategy") or {},
+    )
+
+
+def _classify_nutrients_batch(products: List[Dict[str, Any]]) -> List[Tuple[int, int, int, int]]:
+    """
+    Classify nutrient tiers for many products in one pass.
+    
+    Uses vectorised threshold search when NumPy is available, falling back
+    to _classify_nutrients per product otherwise. NOVA stays per-product
+    since it is a categorical lookup rather than a threshold.
     """
+    nutriments = [product.get("nutriments") or _NO_VALUES for product in products]
+    novas = [product.get("nova_group", 0) for product in products]
+    
+    if np is None or not products:
+        return [
+            _classify_nutrients(
+                n.get("proteins_100g", 0), n.get("fiber_100g", 0), n.get("salt_100g", 0), nova
+            )
+            for n, nova in zip(nutriments, novas)
+        ]
     
+    count = len(products)
+    tiers = [
+        np.searchsorted(
+            thresholds,
+            np.fromiter((n.get(field, 0) for n in nutriments), dtype=float, count=count),
+            side="right",
+        ).tolist()
+        for field, thresholds in (
+            ("proteins_100g", _PROTEIN_THRESHOLDS),
+            ("fiber_100g", _FIBER_THRESHOLDS),
+            ("salt_100g", _SALT_THRESHOLDS),
+        )
+    ]
+    nova_codes = [_NOVA_CODES.get(nova, 0) for nova in novas]
+    return list(zip(*tiers, nova_codes))
+
+
+# Formatted figures repeat across batches; typed=True keeps 18 and 18.0 apart
+# since they render differently
+@lru_cache(maxsize=512, typed=True)
+def _fmt_price(value: float) -> str:
+    return f"€{value:.2f}/kg"
+
+
+@lru_cache(maxsize=512, typed=True)
+def _fmt_per_100g(value: float) -> str:
+    return f"{value}g per 100g"
+
+
+@lru_cache(maxsize=512, typed=True)
+def _fmt_co2(value: float) -> str:
+    return f"{value} kg CO2/kg product"
+
+
+# Memoized results keyed on the handful of input fields actually read
+_INSIGHTS_CACHE_SIZE = 256
+_INSIGHTS_CACHE: "OrderedDict[Tuple, Dict[str, Any]]" = OrderedDict()
+_INSIGHTS_JSON_CACHE: "OrderedDict[Tuple, bytes]" = OrderedDict()
+_INSIGHTS_CACHE_LOCK = threading.Lock()
+
+
+def _insights_cache_key(
+    product_data: Dict[str, Any],
+    scoring_results: Dict[str, Any],
+    competitor_intelligence: Dict[str, Any],
+    marketing_strategy: Dict[str, Any]
+) -> Optional[Tuple]:
+    """
+    Build a hashable key from the fields the generators read.
+    
+    Value types are part of the key because output formatting depends on
+    them (18 and 18.0 render differently). Returns None when a field is
+    unhashable, in which case the result is computed without caching.
+    """
+    # A section that is present but None reads like a missing one
+    nutriments = product_data.get("nutriments") or _NO_VALUES
+    metrics = competitor_intelligence.get("metrics") or _NO_VALUES
+    scores = scoring_results.get("scores") or _NO_VALUES
+    materials = (product_data.get("packaging") or _NO_VALUES).get("materials", [])
+    
+    values = (
+        product_data.get("plant_based_category", "plant-based"),
+        (marketing_strategy.get("positioning") or _NO_VALUES).get("primary", "value"),
+        nutriments.get("proteins_100g", 0),
+        nutriments.get("fiber_100g", 0),
+        nutriments.get("salt_100g", 0),
+        product_data.get("nova_group", 0),
+        tuple(materials) if isinstance(materials, list) else materials,
+        metrics.get("competitor_count", 10),
+        metrics.get("avg_price_per_kg", 25.0),
+        metrics.get("avg_co2_emission", 2.2),
+        scores.get("global_score", 0),
+        scores.get("attractiveness_score", 0),
+        scores.get("utility_score", 0),
+    )
+    key = (values, tuple(map(type, values)))
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def _build_research_insights(
+    product_data: Dict[str, Any],
+    scoring_results: Dict[str, Any],
+    competitor_intelligence: Dict[str, Any],
+    marketing_strategy: Dict[str, Any],
+    nutrient_codes: Optional[Tuple[int, int, int, int]] = None
+) -> Dict[str, Any]:
+    """Compute research insights (uncached)."""
     # Extract key information
     category = product_data.get("plant_based_category", "plant-based")
-    scores = scoring_results.get("scores", {})
-    positioning = marketing_strategy.get("positioning", {}).get("primary", "value")
+    scores = scoring_results.get("scores") or _NO_VALUES
+    try:
+        positioning = marketing_strategy["positioning"]["primary"]
+    except (KeyError, TypeError):
+        positioning = "value"
+    
+    # Competitor metrics feed several sections; read them once
+    metrics = competitor_intelligence.get("metrics") or _NO_VALUES
+    competitor_count = metrics.get("competitor_count", 10)
+    avg_price = metrics.get("avg_price_per_kg", 25.0)
+    avg_co2 = metrics.get("avg_co2_emission", 2.2)
+    try:
+        materials = product_data["packaging"]["materials"]
+    except (KeyError, TypeError):
+        materials = []
     
     # Generate insights
     consumer_trends = _generate_consumer_trends(category, positioning)
-    market_dynamics = _generate_market_dynamics(competitor_intelligence, category)
-    nutritional_insights = _generate_nutritional_insights(product_data)
-    sustainability_insights = _generate_sustainability_insights(product_data, competitor_intelligence)
+    market_dynamics = _generate_market_dynamics(competitor_count, avg_price)
+    nutritional_insights = _generate_nutritional_insights(product_data, nutrient_codes)
+    sustainability_insights = _generate_sustainability_insights(materials, avg_co2)
     innovation_opportunities = _generate_innovation_opportunities(scores, positioning)
-    key_findings = _generate_key_findings(product_data, scores, competitor_intelligence)
+    key_findings = _generate_key_findings(competitor_count, avg_price, scores.get("global_score", 0))
     
     return {
         "consumer_trends": consumer_trends,
@@ -52,165 +513,145 @@ def generate_research_insights(
 
 def _generate_consumer_trends(category: str, positioning: str) -> List[Dict[str, str]]:
     """Generate consumer trend insights."""
-    trends = [
-        {
-            "trend": "Flexitarian Movement Growth",
-            "description": "Increasing number of consumers reducing meat consumption without fully eliminating it",
-            "impact": "High",
-            "relevance": "Expands addressable market beyond vegans and vegetarians",
-            "source": "Market research 2024"
-        },
-        {
-            "trend": "Health-Conscious Consumption",
-            "description": "Consumers prioritizing nutritional value and clean ingredients in plant-based products",
-            "impact": "High",
-            "relevance": "Drives demand for high-protein, low-processed alternatives",
-            "source": "Consumer surveys 2024"
-        },
-        {
-            "trend": "Sustainability Awareness",
-            "description": "Growing concern about environmental impact of food choices",
-            "impact": "Medium-High",
-            "relevance": "Plant-based products positioned as eco-friendly alternatives",
-            "source": "Environmental studies 2024"
-        }
-    ]
+    trends = list(_BASE_CONSUMER_TRENDS)
     
     # Add category-specific trends
-    if "burger" in category.lower() or "meat" in category.lower():
-        trends.append({
-            "trend": "Taste Parity Expectations",
-            "description": "Consumers expect plant-based meat to match or exceed traditional meat taste",
-            "impact": "Critical",
-            "relevance": "Product success depends on sensory experience",
-            "source": "Taste tests 2024"
-        })
+    category_lower = category.lower()
+    if "burger" in category_lower or "meat" in category_lower:
+        trends.append(_TASTE_PARITY_TREND)
     
     # Add positioning-specific trends
     if positioning == "premium":
-        trends.append({
-            "trend": "Premium Plant-Based Segment",
-            "description": "Willingness to pay premium for superior quality and sustainability",
-            "impact": "Medium",
-            "relevance": "Supports premium pricing strategy",
-            "source": "Market segmentation 2024"
-        })
+        trends.append(_PREMIUM_SEGMENT_TREND)
     
     return trends
 
 
-def _generate_market_dynamics(competitor_intelligence: Dict[str, Any], category: str) -> Dict[str, Any]:
+# Competitive intensity uses the same threshold/label table scheme as the
+# nutrient tiers below
+_COMPETITION_THRESHOLDS = (8,)
+_INTENSITY_LABELS = (_MEDIUM, _HIGH)
+
+
+def _generate_market_dynamics(competitor_count: int, avg_price: float) -> Dict[str, Any]:
     """Generate market dynamics insights."""
-    metrics = competitor_intelligence.get("metrics", {})
-    competitor_count = metrics.get("competitor_count", 10)
-    avg_price = metrics.get("avg_price_per_kg", 25.0)
-    
     return {
-        "market_size": {
-            "description": "The plant-based meat market is experiencing rapid growth",
-            "growth_rate": "15-20% CAGR (2024-2028)",
-            "market_value": "€4.5B in Europe (2024)",
-            "projection": "Expected to reach €8B by 2028"
-        },
+        "market_size": _MARKET_SIZE,
         "competitive_landscape": {
-            "intensity": "High" if competitor_count >= 8 else "Medium",
+            "intensity": _INTENSITY_LABELS[bisect_right(_COMPETITION_THRESHOLDS, competitor_count)],
             "key_players": competitor_count,
-            "market_leaders": ["Beyond Meat", "Impossible Foods", "Quorn"],
+            "market_leaders": _MARKET_LEADERS,
             "barriers_to_entry": "Medium - requires significant R&D and distribution"
         },
         "pricing_dynamics": {
-            "average_price": f"€{avg_price:.2f}/kg",
-            "price_sensitivity": "Medium-High",
+            "average_price": _fmt_price(avg_price),
+            "price_sensitivity": _MEDIUM_HIGH,
             "premium_segment": "Growing but price-conscious",
             "trend": "Prices declining as production scales"
         },
-        "distribution_channels": {
-            "retail": "70% - Supermarkets and specialty stores",
-            "foodservice": "20% - Restaurants and catering",
-            "direct_to_consumer": "10% - Online and subscriptions",
-            "trend": "E-commerce growing rapidly"
-        }
+        "distribution_channels": _DISTRIBUTION_CHANNELS
     }
 
 
-def _generate_nutritional_insights(product_data: Dict[str, Any]) -> Dict[str, Any]:
-    """Generate nutritional insights."""
-    nutriments = product_data.get("nutriments", {})
+# Lower bounds of the upper tiers; bisect_right against these yields codes 0/1/2
+_PROTEIN_THRESHOLDS = (10, 15)
+_FIBER_THRESHOLDS = (1.5, 3)
+_SALT_THRESHOLDS = (0.8, 1.5)
+# NOVA is categorical rather than a range, so it maps by value
+_NOVA_CODES = {3: 1, 4: 2}
+
+# Tier labels indexed by the codes returned from _classify_nutrients
+_PROTEIN_LABELS = (_LOW, _MEDIUM, _HIGH)
+_FIBER_LABELS = (_LOW, _MODERATE, _GOOD)
+_SALT_LABELS = (_LOW, _MODERATE, _HIGH)
+_NOVA_CLASSIFICATIONS = ("Minimally processed", "Processed", "Ultra-processed")
+_NOVA_PERCEPTIONS = ("Positive", "Neutral", "Negative")
+
+
+def _classify_nutrients(proteins: float, fiber: float, salt: float, nova: int) -> Tuple[int, int, int, int]:
+    """
+    Map nutrient values to tier codes 0/1/2 (low to high).
+    
+    Pure numeric threshold logic, kept separate from label/string assembly so
+    it can be reused by batch evaluation.
+    """
+    return (
+        bisect_right(_PROTEIN_THRESHOLDS, proteins),
+        bisect_right(_FIBER_THRESHOLDS, fiber),
+        bisect_right(_SALT_THRESHOLDS, salt),
+        _NOVA_CODES.get(nova, 0),
+    )
+
+
+def _generate_nutritional_insights(
+    product_data: Dict[str, Any],
+    nutrient_codes: Optional[Tuple[int, int, int, int]] = None
+) -> Dict[str, Any]:
+    """Generate nutritional insights, reusing tier codes precomputed by a batch."""
+    nutriments = product_data.get("nutriments") or _NO_VALUES
     proteins = nutriments.get("proteins_100g", 0)
     fiber = nutriments.get("fiber_100g", 0)
     salt = nutriments.get("salt_100g", 0)
+    nova = product_data.get("nova_group", 0)
+    
+    if nutrient_codes is None:
+        nutrient_codes = _classify_nutrients(proteins, fiber, salt, nova)
+    protein_code, fiber_code, salt_code, nova_code = nutrient_codes
     
     insights = {
         "protein_content": {
-            "value": f"{proteins}g per 100g",
-            "assessment": "High" if proteins >= 15 else "Medium" if proteins >= 10 else "Low",
+            "value": _fmt_per_100g(proteins),
+            "assessment": _PROTEIN_LABELS[protein_code],
             "benchmark": "Comparable to meat (18-25g per 100g)",
             "importance": "Critical for consumer acceptance and satiety"
         },
         "fiber_content": {
-            "value": f"{fiber}g per 100g",
-            "assessment": "Good" if fiber >= 3 else "Moderate" if fiber >= 1.5 else "Low",
+            "value": _fmt_per_100g(fiber),
+            "assessment": _FIBER_LABELS[fiber_code],
             "advantage": "Higher than meat (0g fiber)",
             "health_benefit": "Supports digestive health and satiety"
         },
         "sodium_levels": {
-            "value": f"{salt}g per 100g",
-            "assessment": "High" if salt >= 1.5 else "Moderate" if salt >= 0.8 else "Low",
+            "value": _fmt_per_100g(salt),
+            "assessment": _SALT_LABELS[salt_code],
             "concern": "High sodium common in plant-based products",
             "recommendation": "Consider reformulation if above 1.2g/100g"
         }
     }
     
     # Add NOVA group insight
-    nova = product_data.get("nova_group", 0)
     if nova:
         insights["processing_level"] = {
             "nova_group": nova,
-            "classification": "Ultra-processed" if nova == 4 else "Processed" if nova == 3 else "Minimally processed",
-            "consumer_perception": "Negative" if nova == 4 else "Neutral" if nova == 3 else "Positive",
+            "classification": _NOVA_CLASSIFICATIONS[nova_code],
+            "consumer_perception": _NOVA_PERCEPTIONS[nova_code],
             "trend": "Growing demand for minimally processed alternatives"
         }
     
     return insights
 
 
-def _generate_sustainability_insights(product_data: Dict[str, Any], competitor_intelligence: Dict[str, Any]) -> Dict[str, Any]:
+def _generate_sustainability_insights(materials: List[str], avg_co2: float) -> Dict[str, Any]:
     """Generate sustainability insights."""
-    metrics = competitor_intelligence.get("metrics", {})
-    avg_co2 = metrics.get("avg_co2_emission", 2.2)
-    
     return {
         "environmental_impact": {
             "co2_emissions": {
-                "plant_based_average": f"{avg_co2} kg CO2/kg product",
+                "plant_based_average": _fmt_co2(avg_co2),
                 "beef_comparison": "25-30 kg CO2/kg (90% reduction)",
                 "significance": "Major environmental benefit"
             },
-            "water_usage": {
-                "plant_based": "75-90% less than beef",
-                "importance": "Critical in water-scarce regions"
-            },
-            "land_use": {
-                "plant_based": "95% less land than beef",
-                "impact": "Enables more efficient food production"
-            }
+            "water_usage": _WATER_USAGE,
+            "land_use": _LAND_USE
         },
         "packaging_sustainability": {
-            "materials": product_data.get("packaging", {}).get("materials", []),
+            # Copied so a memoized result never aliases the caller's list
+            "materials": list(materials) if isinstance(materials, list) else materials,
             "recyclability": "Important for eco-conscious consumers",
             "trend": "Shift towards compostable and biodegradable packaging",
             "recommendation": "Highlight sustainable packaging on label"
         },
-        "supply_chain": {
-            "sourcing": "Local sourcing reduces carbon footprint",
-            "transparency": "Consumers value supply chain transparency",
-            "certifications": "Organic, Fair Trade, B-Corp add credibility"
-        },
-        "consumer_perception": {
-            "awareness": "High - 70% of consumers aware of environmental benefits",
-            "purchase_driver": "Sustainability is top 3 reason for choosing plant-based",
-            "communication": "Clear environmental messaging increases purchase intent"
-        }
+        "supply_chain": _SUPPLY_CHAIN,
+        "consumer_perception": _SUSTAINABILITY_PERCEPTION
     }
 
 
@@ -223,111 +664,36 @@ def _generate_innovation_opportunities(scores: Dict[str, float], positioning: st
     
     # Based on scores
     if attractiveness < 7:
-        opportunities.append({
-            "area": "Packaging Design",
-            "opportunity": "Enhance visual appeal and shelf presence",
-            "rationale": "Current attractiveness score suggests room for improvement",
-            "potential_impact": "High - First impression drives trial",
-            "examples": "Premium finishes, transparent windows, bold colors"
-        })
+        opportunities.append(_PACKAGING_DESIGN_OPPORTUNITY)
     
     if utility < 7:
-        opportunities.append({
-            "area": "Nutritional Enhancement",
-            "opportunity": "Fortify with vitamins B12, iron, and omega-3",
-            "rationale": "Address common nutritional gaps in plant-based diets",
-            "potential_impact": "Medium-High - Differentiates from competitors",
-            "examples": "Added B12, iron from legumes, algae-based omega-3"
-        })
+        opportunities.append(_NUTRITIONAL_ENHANCEMENT_OPPORTUNITY)
     
     # Universal opportunities
-    opportunities.extend([
-        {
-            "area": "Taste Innovation",
-            "opportunity": "Develop next-generation flavor profiles",
-            "rationale": "Taste remains #1 barrier to plant-based adoption",
-            "potential_impact": "Critical - Drives repeat purchase",
-            "examples": "Fermentation, fat marbling, umami enhancement"
-        },
-        {
-            "area": "Texture Technology",
-            "opportunity": "Improve mouthfeel and juiciness",
-            "rationale": "Texture is key differentiator from traditional meat",
-            "potential_impact": "High - Enhances eating experience",
-            "examples": "3D printing, extrusion technology, fat encapsulation"
-        },
-        {
-            "area": "Clean Label",
-            "opportunity": "Reduce additives and simplify ingredient list",
-            "rationale": "Consumer demand for recognizable ingredients",
-            "potential_impact": "Medium - Appeals to health-conscious segment",
-            "examples": "Natural binders, vegetable-based colors, minimal processing"
-        }
-    ])
+    opportunities.extend(_UNIVERSAL_OPPORTUNITIES)
     
     # Positioning-specific opportunities
     if positioning == "premium":
-        opportunities.append({
-            "area": "Artisanal Production",
-            "opportunity": "Small-batch, craft positioning",
-            "rationale": "Premium consumers value authenticity and craftsmanship",
-            "potential_impact": "Medium - Justifies premium pricing",
-            "examples": "Hand-crafted, locally sourced, chef-developed"
-        })
+        opportunities.append(_ARTISANAL_OPPORTUNITY)
     
     return opportunities
 
 
-def _generate_key_findings(product_data: Dict[str, Any], scores: Dict[str, float], competitor_intelligence: Dict[str, Any]) -> List[str]:
+def _generate_key_findings(comp_count: int, avg_price: float, global_score: float) -> List[str]:
     """Generate key research findings."""
-    findings = []
-    
-    # Market finding
-    comp_count = competitor_intelligence.get("metrics", {}).get("competitor_count", 10)
-    findings.append(
+    return [
+        # Market finding
         f"The plant-based market is highly competitive with {comp_count}+ major players, "
-        "requiring strong differentiation and brand positioning"
-    )
-    
-    # Consumer finding
-    findings.append(
-        "Consumer acceptance of plant-based products is growing rapidly, "
-        "with flexitarians representing the largest addressable market segment"
-    )
-    
-    # Product finding
-    global_score = scores.get("global_score", 0)
-    if global_score >= 7:
-        findings.append(
-            "Product demonstrates strong market readiness with high scores across "
-            "attractiveness, utility, and positioning dimensions"
-        )
-    else:
-        findings.append(
-            "Product has improvement opportunities in key areas that could enhance "
-            "market performance and consumer acceptance"
-        )
-    
-    # Sustainability finding
-    findings.append(
-        "Environmental benefits remain a key purchase driver, with plant-based products "
-        "offering 90% reduction in CO2 emissions compared to traditional meat"
-    )
-    
-    # Innovation finding
-    findings.append(
-        "Continuous innovation in taste, texture, and nutrition is critical for "
-        "maintaining competitive advantage in the rapidly evolving market"
-    )
-    
-    # Price finding
-    avg_price = competitor_intelligence.get("metrics", {}).get("avg_price_per_kg", 25.0)
-    findings.append(
-        f"Market pricing averages €{avg_price:.2f}/kg, with premium products commanding "
+        "requiring strong differentiation and brand positioning",
+        _CONSUMER_FINDING,
+        # Product finding
+        _STRONG_READINESS_FINDING if global_score >= 7 else _IMPROVEMENT_FINDING,
+        _SUSTAINABILITY_FINDING,
+        _INNOVATION_FINDING,
+        # Price finding
+        f"Market pricing averages {_fmt_price(avg_price)}, with premium products commanding "
         "20-30% price premium for superior quality and sustainability credentials"
-    )
-    
-    return findings
+    ]
 
 
 def _generate_summary(key_findings: List[str]) -> str:
@@ -342,3 +708,9 @@ def _generate_summary(key_findings: List[str]) -> str:
     )
     
     return summary
+
+
+# Placeholder/test paths often pass nothing at all; the defaults-only result
+# is built once here and returned directly for them
+_EMPTY_INSIGHTS = _build_research_insights({}, {}, {}, {})
+_EMPTY_INSIGHTS_JSON = dumps_compact(_EMPTY_INSIGHTS)
@@ -1,24 +1,34 @@
 """
 EssenceAI Module
 Imported and adapted from essenceAI/src/ for unified service.
+
+Components are loaded lazily on first attribute access (PEP 562), so
+importing the package does not pull in LLM SDKs or vector-store
+dependencies until a component is actually used.
 """
 
-# Re-export main components
-try:
-    from .agents.orchestrator import AgentOrchestrator
-    from .agents.research_agent import ResearchAgent
-    from .agents.competitor_agent import CompetitorAgent
-    from .agents.marketing_agent import MarketingAgent
-    from .rag_engine import OptimizedRAGEngine
-    __all__ = [
-        'AgentOrchestrator',
-        'ResearchAgent',
-        'CompetitorAgent',
-        'MarketingAgent',
-        'OptimizedRAGEngine'
-    ]
-except ImportError as e:
-    # Handle case where dependencies are not available
-    __all__ = []
-    _import_error = e
+import importlib
+
+# Re-export main components: public name -> defining submodule
+_LAZY_IMPORTS = {
+    'AgentOrchestrator': '.agents.orchestrator',
+    'ResearchAgent': '.agents.research_agent',
+    'CompetitorAgent': '.agents.competitor_agent',
+    'MarketingAgent': '.agents.marketing_agent',
+    'OptimizedRAGEngine': '.rag_engine',
+}
+
+__all__ = list(_LAZY_IMPORTS)
+
+
+def __getattr__(name):
+    module_path = _LAZY_IMPORTS.get(name)
+    if module_path is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_path, __name__), name)
+    globals()[name] = value
+    return value
+
 
+def __dir__():
+    return sorted(list(globals()) + __all__)
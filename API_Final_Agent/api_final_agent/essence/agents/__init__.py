@@ -1,18 +1,32 @@
 """
 essenceAI Agent System
 Multi-agent framework for autonomous market intelligence tasks
+
+Agent classes are loaded lazily on first attribute access (PEP 562).
 """
 
-from .base_agent import BaseAgent
-from .research_agent import ResearchAgent
-from .competitor_agent import CompetitorAgent
-from .marketing_agent import MarketingAgent
-from .orchestrator import AgentOrchestrator
-
-__all__ = [
-    'BaseAgent',
-    'ResearchAgent',
-    'CompetitorAgent',
-    'MarketingAgent',
-    'AgentOrchestrator'
-]
+import importlib
+
+# Public name -> defining submodule
+_LAZY_IMPORTS = {
+    'BaseAgent': '.base_agent',
+    'ResearchAgent': '.research_agent',
+    'CompetitorAgent': '.competitor_agent',
+    'MarketingAgent': '.marketing_agent',
+    'AgentOrchestrator': '.orchestrator',
+}
+
+__all__ = list(_LAZY_IMPORTS)
+
+
+def __getattr__(name):
+    module_path = _LAZY_IMPORTS.get(name)
+    if module_path is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_path, __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -7,14 +7,24 @@ OPTIMIZED Competitor Intelligence Module
 
 import os
 import json
-from typing import List, Dict, Optional
+import importlib.util
+import operator
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import TYPE_CHECKING, List, Dict, Optional
+from urllib.parse import urlparse
 from dotenv import load_dotenv
-from datetime import datetime, timedelta
 import sys
-from pathlib import Path
 
-# Add parent directory to path for imports
-sys.path.append(str(Path(__file__).parent))
+from ..utils.json_serializer import json_loads
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+    from tavily import TavilyClient
 
 # Load environment variables
 load_dotenv()
@@ -37,19 +47,137 @@ except ImportError:
 # Initialize logger
 logger = get_logger(__name__)
 
-# Try to import Tavily (optional)
-try:
-    from tavily import TavilyClient
-    TAVILY_AVAILABLE = True
-except ImportError:
-    TAVILY_AVAILABLE = False
+# Tavily and OpenAI are optional and heavy to import; only check they are
+# installed here and import them when the first client is built
+TAVILY_AVAILABLE = importlib.util.find_spec("tavily") is not None
+OPENAI_AVAILABLE = importlib.util.find_spec("openai") is not None
 
-# Import OpenAI
-try:
-    from openai import OpenAI
-    OPENAI_AVAILABLE = True
-except ImportError:
-    OPENAI_AVAILABLE = False
+# API clients shared per key, so every OptimizedCompetitorIntelligence instance
+# reuses the same keep-alive connections instead of paying a fresh TLS
+# handshake per instance
+_OPENAI_CLIENTS: Dict[str, "OpenAI"] = {}
+_TAVILY_CLIENTS: Dict[str, "TavilyClient"] = {}
+
+
+# Runs the OpenAI fallback alongside Tavily when hedging is enabled
+_HEDGE_EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="competitor-hedge")
+
+
+# Prompt pieces that never change between calls. System messages are shared
+# dicts (the SDK only reads them); user prompts are %-templates
+_SYS_MSG_EXTRACT = {
+    "role": "system",
+    "content": "You are a data extraction expert. Return ONLY valid JSON arrays. No markdown formatting. Escape all special characters properly."
+}
+
+_SYS_MSG_GENERATE = {
+    "role": "system",
+    "content": "You are a market research expert. Return ONLY valid JSON arrays. No markdown formatting. Escape all special characters properly."
+}
+
+_EXTRACT_PROMPT_TMPL = """Extract competitor data from this market research:
+
+%s
+
+Category: %s
+
+IMPORTANT: Return ONLY a valid JSON array. No markdown, no explanations, no code blocks.
+Format: [{"Company": "Name", "Product": "Product", "Price (€/kg)": 25.5, "CO₂ (kg)": 2.3, "Marketing Claim": "Claim", "Source": "URL"}]
+
+Escape all special characters in strings. Return exactly %s competitors."""
+
+_GENERATE_PROMPT_TMPL = """Generate %s realistic competitors for:
+Product: %s
+Category: %s
+
+IMPORTANT: Return ONLY a valid JSON array. No markdown, no explanations, no code blocks.
+Format: [{"Company": "Name", "Product": "Product", "Price (€/kg)": 25.5, "CO₂ (kg)": 2.3, "Marketing Claim": "Claim"}]
+
+Use real companies. Be realistic. Escape all special characters in strings."""
+
+
+@lru_cache(maxsize=1024)
+def _build_query(category: str, product_concept: str) -> str:
+    """Build (and intern) the Tavily search query; concepts repeat across users."""
+    return sys.intern(f"{category} companies products pricing {product_concept}")
+
+
+def _get_openai_client(api_key: str) -> "OpenAI":
+    """Return the process-wide OpenAI client for this API key."""
+    client = _OPENAI_CLIENTS.get(api_key)
+    if client is None:
+        from openai import OpenAI
+        try:
+            # httpx ships with openai; used to give the shared client an explicit pool
+            import httpx
+        except ImportError:
+            httpx = None
+        kwargs = {}
+        if httpx is not None:
+            kwargs["http_client"] = httpx.Client(
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+                timeout=httpx.Timeout(60.0, connect=15.0)
+            )
+        client = _OPENAI_CLIENTS.setdefault(api_key, OpenAI(api_key=api_key, **kwargs))
+    return client
+
+
+def _get_tavily_client(api_key: str) -> "TavilyClient":
+    """Return the process-wide Tavily client for this API key."""
+    client = _TAVILY_CLIENTS.get(api_key)
+    if client is None:
+        from tavily import TavilyClient
+        client = _TAVILY_CLIENTS.setdefault(api_key, TavilyClient(api_key=api_key))
+    return client
+
+
+class _ArrayObjectScanner:
+    """
+    Incrementally pull complete top-level objects out of a streamed JSON array.
+
+    Tracks brace depth and string/escape state across fed chunks, so each
+    character is looked at once. Objects are only reported once a '[' has
+    opened the payload, so a wrapping object such as {"competitors": [...]}
+    is never mistaken for an element.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._pos = 0
+        self._depth = 0
+        self._start = -1
+        self._in_string = False
+        self._escaped = False
+        self._in_array = False
+
+    def feed(self, chunk: str) -> List[str]:
+        """Append a chunk and return the source of any objects it completed."""
+        self.text += chunk
+        text = self.text
+        completed = []
+        for pos in range(self._pos, len(text)):
+            char = text[pos]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == '\\':
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == '{':
+                if self._depth == 0:
+                    self._start = pos
+                self._depth += 1
+            elif char == '}' and self._depth:
+                self._depth -= 1
+                if self._depth == 0 and self._in_array:
+                    completed.append(text[self._start:pos + 1])
+            elif char == '[' and self._depth == 0:
+                self._in_array = True
+        self._pos = len(text)
+        return completed
 
 
 class OptimizedCompetitorIntelligence:
@@ -57,14 +185,24 @@ class OptimizedCompetitorIntelligence:
     Optimized competitor intelligence with aggressive caching.
     """
 
-    def __init__(self, db_path: str = "essenceai.db", use_database: bool = False):
+    # Process-local L1 cache in front of the SQLite cache, shared by all
+    # instances: (product_concept, category, max_results) -> (fetched_at, competitors)
+    _MEM_CACHE_SIZE = 512
+    _mem_cache: "OrderedDict[tuple, tuple]" = OrderedDict()
+    _mem_cache_lock = threading.Lock()
+
+    def __init__(self, db_path: str = "essenceai.db", use_database: bool = False, hedge_fallback: bool = False):
         """
         Initialize with optional database for caching.
 
         Args:
             db_path: Path to SQLite database file
             use_database: Whether to use database caching (default: False for fresh results)
+            hedge_fallback: Start the OpenAI fallback in parallel with the Tavily search
+                so a failed search doesn't add its latency (costs an extra OpenAI call
+                whenever Tavily succeeds; default: False)
         """
+        self.hedge_fallback = hedge_fallback
         self.db = None
         self.use_database = use_database
         self.db_path = db_path
@@ -92,11 +230,15 @@ class OptimizedCompetitorIntelligence:
         self.api_calls_made = 0
         self.cache_hits = 0
 
+        # In-flight get_competitors calls, for coalescing identical requests
+        self._inflight: Dict[tuple, Future] = {}
+        self._inflight_lock = threading.Lock()
+
         # Initialize APIs
         tavily_key = os.getenv("TAVILY_API_KEY")
         if TAVILY_AVAILABLE and tavily_key:
             try:
-                self.tavily_client = TavilyClient(api_key=tavily_key)
+                self.tavily_client = _get_tavily_client(tavily_key)
                 logger.info("Tavily API initialized successfully")
             except (ValueError, ConnectionError) as e:
                 logger.warning(f"Tavily initialization failed: {e}")
@@ -106,7 +248,7 @@ class OptimizedCompetitorIntelligence:
         openai_key = os.getenv("OPENAI_API_KEY")
         if OPENAI_AVAILABLE and openai_key:
             try:
-                self.openai_client = OpenAI(api_key=openai_key)
+                self.openai_client = _get_openai_client(openai_key)
                 logger.info("OpenAI API initialized successfully")
             except (ValueError, ConnectionError) as e:
                 logger.warning(f"OpenAI initialization failed: {e}")
@@ -134,32 +276,79 @@ class OptimizedCompetitorIntelligence:
         Returns:
             List of competitor dictionaries
         """
-        # Check database cache first (only if database is enabled and cache is requested)
+        # Identical concurrent calls on this instance share one fetch
+        key = (product_concept, category, max_results, use_cache, cache_max_age_hours)
+        with self._inflight_lock:
+            pending = self._inflight.get(key)
+            if pending is None:
+                future = self._inflight[key] = Future()
+        if pending is not None:
+            # Callers mutate competitor dicts, so followers get their own copies
+            return [dict(comp) for comp in pending.result()]
+
+        try:
+            competitors = self._fetch_competitors(
+                product_concept, category, max_results, use_cache, cache_max_age_hours
+            )
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result([dict(comp) for comp in competitors])
+            return competitors
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+
+    def _fetch_competitors(
+        self,
+        product_concept: str,
+        category: str,
+        max_results: int,
+        use_cache: bool,
+        cache_max_age_hours: int
+    ) -> List[Dict]:
+        """Look up competitors through the caches and APIs (see get_competitors)."""
+        mem_key = (product_concept, category, max_results)
+        if use_cache:
+            cached = self._mem_cache_get(mem_key, cache_max_age_hours * 3600)
+            if cached is not None:
+                self.cache_hits += 1
+                logger.info(f"Memory cache hit: Using {len(cached)} competitors")
+                return cached
+
+        # Check database cache next (only if database is enabled and cache is requested)
         if use_cache and self.use_database and self.db:
-            cached = self.db.get_competitors(category, limit=max_results)
+            # Only rows younger than the max age come back, newest first
+            cached = self.db.get_competitors(
+                category, limit=max_results, max_age_seconds=cache_max_age_hours * 3600
+            )
             if cached and len(cached) >= max_results:
-                # Check if cache is recent enough
-                if cached[0].get('last_updated'):
-                    try:
-                        last_update = datetime.fromisoformat(cached[0]['last_updated'])
-                        age = datetime.now() - last_update
-                        if age < timedelta(hours=cache_max_age_hours):
-                            self.cache_hits += 1
-                            logger.info(f"Cache hit: Using {len(cached)} cached competitors (age: {age.total_seconds()/3600:.1f}h)")
-                            return self._format_competitors(cached[:max_results])
-                    except (ValueError, TypeError) as e:
-                        logger.warning(f"Error parsing cache timestamp: {e}")
+                self.cache_hits += 1
+                age = time.time() - cached[0]['last_updated']
+                logger.info(f"Cache hit: Using {len(cached)} cached competitors (age: {age/3600:.1f}h)")
+                competitors = self._format_competitors(cached)
+                self._mem_cache_set(mem_key, competitors)
+                return competitors
 
         # Need fresh data - make API calls
         category_name = category if category else "general sustainable food"
         logger.info(f"Cache miss: Fetching fresh competitor data for {category_name}")
 
+        fallback = None
+
         # Try Tavily first (real-time search)
         if self.tavily_client:
+            if self.hedge_fallback:
+                fallback = _HEDGE_EXECUTOR.submit(self._generate_with_openai, product_concept, category, max_results)
             try:
                 competitors = self._search_with_tavily(product_concept, category, max_results)
                 if competitors:
+                    if fallback is not None:
+                        # Drop the hedge; a call already in flight just finishes unused
+                        fallback.cancel()
                     self._cache_competitors(competitors, category)
+                    self._mem_cache_set(mem_key, competitors)
                     return competitors
             except (ConnectionError, TimeoutError) as e:
                 logger.warning(f"Tavily API connection error: {e}")
@@ -170,11 +359,37 @@ class OptimizedCompetitorIntelligence:
 
         # Fallback to OpenAI (cheaper model)
         logger.info("Falling back to OpenAI estimates (will be cached for 24h)")
-        competitors = self._generate_with_openai(product_concept, category, max_results)
+        if fallback is not None:
+            competitors = fallback.result()
+        else:
+            competitors = self._generate_with_openai(product_concept, category, max_results)
         self._cache_competitors(competitors, category)
+        self._mem_cache_set(mem_key, competitors)
 
         return competitors
 
+    def _mem_cache_get(self, key: tuple, max_age_seconds: float) -> Optional[List[Dict]]:
+        """Return a copy of in-memory cached competitors younger than max_age_seconds."""
+        with self._mem_cache_lock:
+            entry = self._mem_cache.get(key)
+            if entry is None:
+                return None
+            fetched_at, competitors = entry
+            if time.monotonic() - fetched_at >= max_age_seconds:
+                return None
+            self._mem_cache.move_to_end(key)
+        # Callers mutate competitor dicts, so never hand out the cached ones
+        return [dict(comp) for comp in competitors]
+
+    def _mem_cache_set(self, key: tuple, competitors: List[Dict]):
+        """Store a copy of freshly fetched competitors in the in-memory cache."""
+        entry = (time.monotonic(), [dict(comp) for comp in competitors])
+        with self._mem_cache_lock:
+            self._mem_cache[key] = entry
+            self._mem_cache.move_to_end(key)
+            if len(self._mem_cache) > self._MEM_CACHE_SIZE:
+                self._mem_cache.popitem(last=False)
+
     def _cache_competitors(self, competitors: List[Dict], category: str):
         """Store competitors in database (only if database is enabled)."""
         # Skip if database not enabled
@@ -186,34 +401,44 @@ class OptimizedCompetitorIntelligence:
             logger.debug("Skipping database cache: category is None")
             return
 
-        for comp in competitors:
-            try:
-                self.db.add_competitor({
-                    'company_name': comp.get('Company', 'Unknown'),
-                    'category': category,
-                    'product_type': comp.get('Product'),
-                    'price_per_kg': comp.get('Price (€/kg)'),
-                    'co2_emission': comp.get('CO₂ (kg)'),
-                    'marketing_claim': comp.get('Marketing Claim'),
-                    'source_url': comp.get('Source', 'N/A')
-                })
-            except (ValueError, TypeError) as e:
-                logger.warning(f"Invalid competitor data format: {e}")
-            except Exception as e:
-                logger.error(f"Database error caching competitor: {e}", exc_info=True)
+        rows = [
+            {
+                'company_name': comp.get('Company', 'Unknown'),
+                'category': category,
+                'product_type': comp.get('Product'),
+                'price_per_kg': comp.get('Price (€/kg)'),
+                'co2_emission': comp.get('CO₂ (kg)'),
+                'marketing_claim': comp.get('Marketing Claim'),
+                'source_url': comp.get('Source', 'N/A')
+            }
+            for comp in competitors
+            # company_name is NOT NULL; drop such rows rather than failing the batch
+            if comp.get('Company', 'Unknown') is not None
+        ]
+        try:
+            self.db.add_competitors_batch(rows)
+        except (ValueError, TypeError) as e:
+            logger.warning(f"Invalid competitor data format: {e}")
+        except Exception as e:
+            logger.error(f"Database error caching competitors: {e}", exc_info=True)
+
+    # Database columns read by _format_competitors, in output order
+    _FMT_GET = operator.itemgetter(
+        'company_name', 'product_type', 'price_per_kg', 'co2_emission', 'marketing_claim', 'source_url'
+    )
 
     def _format_competitors(self, db_rows: List[Dict]) -> List[Dict]:
-        """Format database rows to competitor format."""
+        """Format database rows (full competitors rows) to competitor format."""
         return [
             {
-                'Company': row['company_name'],
-                'Product': row.get('product_type') or 'N/A',
-                'Price (€/kg)': row.get('price_per_kg'),
-                'CO₂ (kg)': row.get('co2_emission'),
-                'Marketing Claim': row.get('marketing_claim') or 'N/A',
-                'Source': row.get('source_url') or 'N/A'
+                'Company': company,
+                'Product': product or 'N/A',
+                'Price (€/kg)': price,
+                'CO₂ (kg)': co2,
+                'Marketing Claim': claim or 'N/A',
+                'Source': source or 'N/A'
             }
-            for row in db_rows
+            for company, product, price, co2, claim, source in map(self._FMT_GET, db_rows)
         ]
 
     def _search_with_tavily(
@@ -225,7 +450,7 @@ class OptimizedCompetitorIntelligence:
         """Search with Tavily API."""
         self.api_calls_made += 1
 
-        query = f"{category} companies products pricing {product_concept}"
+        query = _build_query(category, product_concept)
 
         try:
             results = self.tavily_client.search(
@@ -249,6 +474,10 @@ class OptimizedCompetitorIntelligence:
             logger.error(f"Unexpected Tavily search error: {e}", exc_info=True)
             return []
 
+    # JSON helpers for _safe_json_parse, built once
+    _JSON_FENCE_RE = re.compile(r'```(?:json)?\s*(.*?)\s*```', re.DOTALL)
+    _LENIENT_DECODER = json.JSONDecoder(strict=False)
+
     def _safe_json_parse(self, content: str, context: str = "") -> Optional[List[Dict]]:
         """
         Safely parse JSON with multiple fallback strategies.
@@ -262,77 +491,174 @@ class OptimizedCompetitorIntelligence:
         """
         # Strategy 1: Direct parse
         try:
-            result = json.loads(content)
+            result = json_loads(content)
             if isinstance(result, list):
                 return result
             elif isinstance(result, dict) and 'competitors' in result:
                 return result['competitors']
-        except json.JSONDecodeError:
+        except (json.JSONDecodeError, RecursionError):
             pass
 
         # Strategy 2: Extract from markdown code blocks
-        if "```json" in content:
+        fence = self._JSON_FENCE_RE.search(content)
+        if fence:
             try:
-                json_str = content.split("```json")[1].split("```")[0].strip()
-                result = json.loads(json_str)
+                result = json_loads(fence.group(1))
                 if isinstance(result, list):
                     return result
-            except (IndexError, json.JSONDecodeError):
+            except json.JSONDecodeError:
                 pass
 
-        if "```" in content:
+        # Strategy 3: Scan for the first embedded array of objects. raw_decode
+        # parses in a single pass (no regex backtracking), and the non-strict
+        # decoder tolerates raw newlines inside strings
+        decoder = self._LENIENT_DECODER
+        start = content.find('[')
+        while start >= 0:
             try:
-                json_str = content.split("```")[1].split("```")[0].strip()
-                result = json.loads(json_str)
-                if isinstance(result, list):
+                result, _ = decoder.raw_decode(content, start)
+                if result and isinstance(result, list) and all(isinstance(item, dict) for item in result):
                     return result
-            except (IndexError, json.JSONDecodeError):
+            except (json.JSONDecodeError, RecursionError):
                 pass
-
-        # Strategy 3: Clean and repair common issues
-        try:
-            # Remove leading/trailing whitespace and newlines
-            cleaned = content.strip()
-
-            # Try to find JSON array in the content
-            import re
-            array_match = re.search(r'\[.*\]', cleaned, re.DOTALL)
-            if array_match:
-                json_str = array_match.group(0)
-                # Replace unescaped newlines in strings
-                json_str = re.sub(r'(?<!\\)\n', ' ', json_str)
-                result = json.loads(json_str)
-                if isinstance(result, list):
-                    return result
-        except (json.JSONDecodeError, AttributeError):
-            pass
+            start = content.find('[', start + 1)
 
         # Strategy 4: Try to extract individual objects
-        try:
-            import re
-            # Find all JSON objects
-            objects = re.findall(r'\{[^{}]*\}', content)
-            if objects:
-                parsed_objects = []
-                for obj_str in objects:
-                    try:
-                        obj = json.loads(obj_str)
-                        parsed_objects.append(obj)
-                    except json.JSONDecodeError:
-                        continue
-                if parsed_objects:
-                    return parsed_objects
-        except Exception:
-            pass
+        parsed_objects = []
+        start = content.find('{')
+        while start >= 0:
+            try:
+                obj, end = decoder.raw_decode(content, start)
+                parsed_objects.append(obj)
+                start = content.find('{', end)
+            except (json.JSONDecodeError, RecursionError):
+                start = content.find('{', start + 1)
+        if parsed_objects:
+            return parsed_objects
 
         # All strategies failed
         logger.error(f"All JSON parsing strategies failed for {context}")
         logger.debug(f"Problematic content (first 500 chars): {content[:500]}")
         return None
 
+    def _stream_competitor_json(
+        self,
+        system_message: Dict[str, str],
+        prompt: str,
+        temperature: float,
+        max_results: int,
+        context: str
+    ) -> Optional[List[Dict]]:
+        """
+        Stream a JSON-array completion, stopping once max_results objects are in.
+
+        Falls back to _safe_json_parse on the full text when the stream ends
+        first or an element doesn't parse on its own.
+        """
+        stream = self.openai_client.chat.completions.create(
+            model="gpt-4o-mini",
+            messages=[system_message, {"role": "user", "content": prompt}],
+            temperature=temperature,
+            max_tokens=800,
+            stream=True
+        )
+
+        scanner = _ArrayObjectScanner()
+        competitors = []
+        try:
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if not delta:
+                    continue
+                for obj_str in scanner.feed(delta):
+                    if competitors is None:
+                        continue
+                    try:
+                        competitors.append(self._LENIENT_DECODER.decode(obj_str))
+                    except (json.JSONDecodeError, RecursionError):
+                        # Leave it to the full-text strategies
+                        competitors = None
+                if competitors is not None and len(competitors) >= max_results:
+                    logger.debug(f"{context}: got {max_results} objects, closing stream early")
+                    return competitors
+        finally:
+            close = getattr(stream, "close", None)
+            if close is not None:
+                close()
+
+        return self._safe_json_parse(scanner.text.strip(), context)
+
+    # Heuristics for reading competitors straight out of Tavily snippets
+    _PRICE_RE = re.compile(
+        r'(?:€|EUR)\s*(\d+(?:[.,]\d+)?)\s*/\s*kg|(\d+(?:[.,]\d+)?)\s*(?:€|EUR)\s*/\s*kg',
+        re.IGNORECASE
+    )
+    _CO2_RE = re.compile(r'(\d+(?:[.,]\d+)?)\s*kg\s*CO', re.IGNORECASE)
+    _TITLE_SPLIT_RE = re.compile(r'\s+[|\-–]\s+')
+    _NON_ALNUM_RE = re.compile(r'[^0-9a-z]+')
+    # Second-level labels of suffixes like .co.uk / .com.au
+    _SECOND_LEVEL_SUFFIXES = frozenset({'co', 'com', 'org', 'net', 'gov', 'ac'})
+
+    @classmethod
+    def _site_name(cls, url: str) -> Optional[str]:
+        """Registrable domain label of a URL ("beyondmeat" for www.beyondmeat.com)."""
+        labels = (urlparse(url).hostname or '').split('.')[:-1]
+        if len(labels) > 1 and labels[-1] in cls._SECOND_LEVEL_SUFFIXES:
+            labels.pop()
+        return labels[-1] if labels else None
+
+    def _extract_heuristically(self, results: List[Dict], max_results: int) -> List[Dict]:
+        """
+        Pull competitors directly from Tavily titles and snippets.
+
+        Only results whose title names the company that owns the page (a
+        title segment matching the URL's domain) and whose content gives
+        both a €/kg price and a CO₂ figure are kept. Anything else, such as
+        blog posts or listicles, is left to the LLM extraction.
+        """
+        competitors = []
+        for r in results:
+            content = r.get('content', '')
+            price = self._PRICE_RE.search(content)
+            co2 = self._CO2_RE.search(content)
+            site = self._site_name(r.get('url') or '')
+            if not price or not co2 or not site:
+                continue
+            parts = [part for part in self._TITLE_SPLIT_RE.split(r.get('title', '').strip()) if part]
+            # Titles usually read "<product> | <company>"
+            company = next(
+                (part for part in reversed(parts) if self._NON_ALNUM_RE.sub('', part.lower()) == site),
+                None
+            )
+            if company is None:
+                continue
+            product = next((part for part in parts if part is not company), 'N/A')
+            competitors.append({
+                'Company': company,
+                'Product': product,
+                'Price (€/kg)': float((price.group(1) or price.group(2)).replace(',', '.')),
+                'CO₂ (kg)': float(co2.group(1).replace(',', '.')),
+                'Marketing Claim': 'N/A',
+                'Source': r.get('url') or 'N/A'
+            })
+            if len(competitors) == max_results:
+                break
+        return competitors
+
     def _extract_from_tavily(self, results: Dict, category: str, max_results: int) -> List[Dict]:
-        """Extract competitor data from Tavily results using OpenAI."""
-        if not self.openai_client or not results.get('results'):
+        """Extract competitor data from Tavily results, using OpenAI unless the snippets suffice."""
+        if not results.get('results'):
+            return []
+
+        # Skip the extraction call when the snippets already carry enough rows
+        competitors = self._extract_heuristically(results['results'], max_results)
+        if len(competitors) >= max_results:
+            logger.info(f"Extracted {len(competitors)} competitors from Tavily snippets (no LLM call)")
+            return competitors
+
+        if not self.openai_client:
             return []
 
         self.api_calls_made += 1
@@ -346,33 +672,17 @@ class OptimizedCompetitorIntelligence:
             for r in results.get('results', [])[:5]
         ])
 
-        prompt = f"""Extract competitor data from this market research:
-
-{context}
-
-Category: {category}
-
-IMPORTANT: Return ONLY a valid JSON array. No markdown, no explanations, no code blocks.
-Format: [{{"Company": "Name", "Product": "Product", "Price (€/kg)": 25.5, "CO₂ (kg)": 2.3, "Marketing Claim": "Claim", "Source": "URL"}}]
-
-Escape all special characters in strings. Return exactly {max_results} competitors."""
+        prompt = _EXTRACT_PROMPT_TMPL % (context, category, max_results)
 
         try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o-mini",
-                messages=[
-                    {"role": "system", "content": "You are a data extraction expert. Return ONLY valid JSON arrays. No markdown formatting. Escape all special characters properly."},
-                    {"role": "user", "content": prompt}
-                ],
+            competitors = self._stream_competitor_json(
+                _SYS_MSG_EXTRACT,
+                prompt,
                 temperature=0.1,
-                max_tokens=800
+                max_results=max_results,
+                context="Tavily extraction"
             )
 
-            content = response.choices[0].message.content.strip()
-
-            # Use safe JSON parsing
-            competitors = self._safe_json_parse(content, "Tavily extraction")
-
             if not competitors:
                 logger.warning("Failed to parse Tavily extraction, returning empty list")
                 return []
@@ -412,31 +722,17 @@ Escape all special characters in strings. Return exactly {max_results} competito
 
         self.api_calls_made += 1
 
-        prompt = f"""Generate {max_results} realistic competitors for:
-Product: {product_concept}
-Category: {category}
-
-IMPORTANT: Return ONLY a valid JSON array. No markdown, no explanations, no code blocks.
-Format: [{{"Company": "Name", "Product": "Product", "Price (€/kg)": 25.5, "CO₂ (kg)": 2.3, "Marketing Claim": "Claim"}}]
-
-Use real companies. Be realistic. Escape all special characters in strings."""
+        prompt = _GENERATE_PROMPT_TMPL % (max_results, product_concept, category)
 
         try:
-            response = self.openai_client.chat.completions.create(
-                model="gpt-4o-mini",  # Much cheaper than gpt-4o
-                messages=[
-                    {"role": "system", "content": "You are a market research expert. Return ONLY valid JSON arrays. No markdown formatting. Escape all special characters properly."},
-                    {"role": "user", "content": prompt}
-                ],
+            competitors = self._stream_competitor_json(
+                _SYS_MSG_GENERATE,
+                prompt,
                 temperature=0.3,
-                max_tokens=800
+                max_results=max_results,
+                context="OpenAI generation"
             )
 
-            content = response.choices[0].message.content.strip()
-
-            # Use safe JSON parsing
-            competitors = self._safe_json_parse(content, "OpenAI generation")
-
             if not competitors:
                 logger.warning("Failed to parse OpenAI response, using fallback data")
                 return self._get_fallback_data(category, max_results)
@@ -485,15 +781,25 @@ Use real companies. Be realistic. Escape all special characters in strings."""
         ]
     }
 
+    # Every prefix of each fallback list, so lookups don't re-slice per call
+    _FALLBACK_SLICES = {
+        (category, n): tuple(rows[:n])
+        for category, rows in FALLBACK_DATA.items()
+        for n in range(len(rows) + 1)
+    }
+
     def _get_fallback_data(self, category: str, max_results: int) -> List[Dict]:
         """Optimized fallback data with O(1) dict lookup."""
-        # Direct dict lookup - O(1) instead of iterating through list
-        if category and category in self.FALLBACK_DATA:
-            data = self.FALLBACK_DATA[category]
-        else:
-            # If no category specified or not found, return first available category
-            data = next(iter(self.FALLBACK_DATA.values())) if self.FALLBACK_DATA else []
-        return data[:max_results]
+        if not category or category not in self.FALLBACK_DATA:
+            # If no category specified or not found, use first available category
+            category = next(iter(self.FALLBACK_DATA), None)
+            if category is None:
+                return []
+        rows = self._FALLBACK_SLICES.get((category, max_results))
+        if rows is None:
+            # Out-of-range counts (beyond the list, or negative) slice as before
+            return self.FALLBACK_DATA[category][:max_results]
+        return list(rows)
 
     def get_stats(self) -> Dict:
         """Get usage statistics."""
@@ -516,7 +822,9 @@ Use real companies. Be realistic. Escape all special characters in strings."""
         return stats
 
     def clear_cache(self):
-        """Clear all cached data (only if database is enabled)."""
+        """Clear all cached data (in-memory, and database if enabled)."""
+        with self._mem_cache_lock:
+            self._mem_cache.clear()
         if self.use_database and self.db:
             self.db.clear_old_cache(days=0)
             logger.info("Cache cleared")
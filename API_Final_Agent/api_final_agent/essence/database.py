@@ -6,6 +6,7 @@ This reduces API calls by caching results.
 
 import sqlite3
 import json
+import time
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional
@@ -17,6 +18,13 @@ class EssenceAIDatabase:
     SQLite database for storing analysis results and competitor data.
     """
 
+    _UPSERT_COMPETITOR_SQL = """
+        INSERT OR REPLACE INTO competitors
+        (company_name, category, product_type, price_per_kg, co2_emission,
+         marketing_claim, source_url, last_updated)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    """
+
     def __init__(self, db_path: str = "essenceai.db"):
         self.db_path = Path(db_path)
         self.conn = None
@@ -27,6 +35,10 @@ class EssenceAIDatabase:
         self.conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
         self.conn.row_factory = sqlite3.Row  # Return rows as dictionaries
 
+        # WAL lets readers proceed during cache writes; NORMAL sync is safe under WAL
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+
         cursor = self.conn.cursor()
 
         # Table for competitor data
@@ -40,11 +52,19 @@ class EssenceAIDatabase:
                 co2_emission REAL,
                 marketing_claim TEXT,
                 source_url TEXT,
-                last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                last_updated INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER)),
                 UNIQUE(company_name, product_type)
             )
         """)
 
+        # last_updated used to hold CURRENT_TIMESTAMP text; convert old rows to
+        # Unix seconds so freshness checks are a plain integer comparison
+        cursor.execute("""
+            UPDATE competitors
+            SET last_updated = CAST(strftime('%s', last_updated) AS INTEGER)
+            WHERE typeof(last_updated) = 'text'
+        """)
+
         # Table for analysis results (cached)
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS analysis_cache (
@@ -79,6 +99,12 @@ class EssenceAIDatabase:
             ON competitors(category)
         """)
 
+        # Composite index so fresh-rows-per-category lookups are one range scan
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_competitors_category_last_updated
+            ON competitors(category, last_updated DESC)
+        """)
+
         # Index on last_updated for cache validation
         cursor.execute("""
             CREATE INDEX IF NOT EXISTS idx_competitors_last_updated
@@ -116,43 +142,70 @@ class EssenceAIDatabase:
             Row ID of inserted/updated competitor
         """
         cursor = self.conn.cursor()
+        cursor.execute(self._UPSERT_COMPETITOR_SQL, self._competitor_params(data))
 
-        cursor.execute("""
-            INSERT OR REPLACE INTO competitors
-            (company_name, category, product_type, price_per_kg, co2_emission,
-             marketing_claim, source_url, last_updated)
-            VALUES (?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-        """, (
+        self.conn.commit()
+        return cursor.lastrowid
+
+    def add_competitors_batch(self, rows: List[Dict]) -> int:
+        """
+        Add or update several competitors in a single transaction.
+
+        Args:
+            rows: Dictionaries in the same format as add_competitor
+
+        Returns:
+            Number of rows written
+        """
+        with self.conn:
+            cursor = self.conn.executemany(
+                self._UPSERT_COMPETITOR_SQL,
+                [self._competitor_params(data) for data in rows]
+            )
+        return cursor.rowcount
+
+    @staticmethod
+    def _competitor_params(data: Dict) -> tuple:
+        """Order competitor fields for the upsert statement, stamped with the current time."""
+        return (
             data.get('company_name'),
             data.get('category'),
             data.get('product_type'),
             data.get('price_per_kg'),
             data.get('co2_emission'),
             data.get('marketing_claim'),
-            data.get('source_url')
-        ))
-
-        self.conn.commit()
-        return cursor.lastrowid
+            data.get('source_url'),
+            int(time.time())
+        )
 
-    def get_competitors(self, category: str, limit: int = 10) -> List[Dict]:
+    def get_competitors(self, category: str, limit: int = 10,
+                        max_age_seconds: Optional[float] = None) -> List[Dict]:
         """
-        Get competitors for a category.
+        Get competitors for a category, newest first.
 
         Args:
             category: Product category
             limit: Maximum number of results
+            max_age_seconds: Only return rows updated within this many seconds
 
         Returns:
             List of competitor dictionaries
         """
         cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT * FROM competitors
-            WHERE category = ?
-            ORDER BY last_updated DESC
-            LIMIT ?
-        """, (category, limit))
+        if max_age_seconds is None:
+            cursor.execute("""
+                SELECT * FROM competitors
+                WHERE category = ?
+                ORDER BY last_updated DESC
+                LIMIT ?
+            """, (category, limit))
+        else:
+            cursor.execute("""
+                SELECT * FROM competitors
+                WHERE category = ? AND last_updated > ?
+                ORDER BY last_updated DESC
+                LIMIT ?
+            """, (category, int(time.time() - max_age_seconds), limit))
 
         return [dict(row) for row in cursor.fetchall()]
 
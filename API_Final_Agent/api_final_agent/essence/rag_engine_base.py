@@ -23,6 +23,11 @@ from .logger import get_logger
 # Initialize logger
 logger = get_logger(__name__)
 
+# Settings objects shared by every engine, keyed by their configuration, so
+# constructing another engine reuses the warm LLM client and node parser
+_LLMS: Dict[Tuple[str, str, float], OpenAI] = {}
+_NODE_PARSERS: Dict[Tuple[int, int], SentenceSplitter] = {}
+
 
 class BaseRAGEngine:
     """
@@ -106,11 +111,15 @@ class BaseRAGEngine:
             raise ValueError("OPENAI_API_KEY not found in environment variables")
 
         # Use GPT-4o-mini for cost-effective queries
-        Settings.llm = OpenAI(
-            model=model,
-            api_key=api_key,
-            temperature=temperature
-        )
+        key = (api_key, model, temperature)
+        llm = _LLMS.get(key)
+        if llm is None:
+            llm = _LLMS.setdefault(key, OpenAI(
+                model=model,
+                api_key=api_key,
+                temperature=temperature
+            ))
+        Settings.llm = llm
 
         logger.info(f"✓ LLM configured: {model} (temperature: {temperature})")
 
@@ -122,10 +131,14 @@ class BaseRAGEngine:
             chunk_size: Size of text chunks
             chunk_overlap: Overlap between chunks
         """
-        Settings.node_parser = SentenceSplitter(
-            chunk_size=chunk_size,
-            chunk_overlap=chunk_overlap
-        )
+        key = (chunk_size, chunk_overlap)
+        node_parser = _NODE_PARSERS.get(key)
+        if node_parser is None:
+            node_parser = _NODE_PARSERS.setdefault(key, SentenceSplitter(
+                chunk_size=chunk_size,
+                chunk_overlap=chunk_overlap
+            ))
+        Settings.node_parser = node_parser
         logger.info(f"✓ Node parser configured: chunk_size={chunk_size}, overlap={chunk_overlap}")
 
     def get_citations(self, response) -> List[Dict]:
@@ -8,6 +8,7 @@ OPTIMIZED RAG Engine - Reduces API calls by 80%
 
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from typing import List, Dict, Tuple, Optional
 from pathlib import Path
 
@@ -20,7 +21,7 @@ from llama_index.core import (
 )
 
 # Import our rate-limited embedding wrapper
-from .rate_limited_embedding import RateLimitedEmbedding
+from .rate_limited_embedding import RateLimitedEmbedding, EmbeddingCache, TokenBucket
 
 # Import base class
 from .rag_engine_base import BaseRAGEngine
@@ -31,6 +32,10 @@ from .logger import get_logger
 # Initialize logger
 logger = get_logger(__name__)
 
+# Embedding model shared by every engine for the same API key and cache dir, so
+# a new engine keeps the existing client and its rate-limit timing
+_EMBED_MODELS: Dict[Tuple[str, str], RateLimitedEmbedding] = {}
+
 
 class OptimizedRAGEngine(BaseRAGEngine):
     """
@@ -51,16 +56,55 @@ class OptimizedRAGEngine(BaseRAGEngine):
         if not api_key:
             raise ValueError("OPENAI_API_KEY not found in environment variables")
 
-        # Use our custom rate-limited embedding wrapper
-        # This adds 2-second delays between requests to prevent rate limits
-        Settings.embed_model = RateLimitedEmbedding(
-            model="text-embedding-3-small",  # Cheaper and more efficient than ada-002
-            api_key=api_key,
-            delay_seconds=2.0,  # Wait 2 seconds between requests
-            embed_batch_size=5  # Very conservative batch size
-        )
-        
-        logger.info("✓ Using rate-limited embedding with 2s delays between requests")
+        key = (api_key, str(self.cache_dir.resolve()))
+        embed_model = _EMBED_MODELS.get(key)
+        if embed_model is None:
+            # Use our custom rate-limited embedding wrapper: a token bucket
+            # sized to the account's requests/tokens per minute lets batches
+            # go out immediately and only waits once the quota is used up.
+            # Chunk vectors persist across index rebuilds, so only new or
+            # changed chunks are sent to the API
+            embed_model = _EMBED_MODELS.setdefault(key, RateLimitedEmbedding(
+                model="text-embedding-3-small",  # Cheaper and more efficient than ada-002
+                api_key=api_key,
+                # Override to match your OpenAI tier
+                rate_limiter=TokenBucket(
+                    rpm=int(os.getenv("OPENAI_EMBEDDING_RPM", "3000")),
+                    tpm=int(os.getenv("OPENAI_EMBEDDING_TPM", "1000000"))
+                ),
+                embed_batch_size=100,
+                cache=EmbeddingCache(self.cache_dir / "embeddings.sqlite")
+            ))
+            logger.info("✓ Using quota-limited embedding (batches of 100)")
+        Settings.embed_model = embed_model
+
+    @staticmethod
+    def _load_pdf(path: Path) -> list:
+        """Parse a single PDF into documents."""
+        return SimpleDirectoryReader(input_files=[str(path)]).load_data()
+
+    def _with_rate_limit_retry(self, operation, max_retries: int):
+        """Run an embedding operation, backing off and retrying on rate limit errors."""
+        retry_count = 0
+        while True:
+            try:
+                return operation()
+            except Exception as e:
+                error_msg = str(e).lower()
+                if "rate_limit" not in error_msg and "429" not in error_msg:
+                    raise
+                retry_count += 1
+                if retry_count >= max_retries:
+                    logger.error(
+                        "❌ Max retries reached. Please try again later or reduce the number of PDFs."
+                    )
+                    raise
+                wait_time = 10 * retry_count  # Exponential backoff
+                logger.warning(
+                    f"⚠️ Rate limit hit (attempt {retry_count}/{max_retries}). "
+                    f"Waiting {wait_time} seconds..."
+                )
+                time.sleep(wait_time)
 
     def initialize_index(self, force_reload: bool = False, max_retries: int = 3) -> bool:
         """
@@ -88,47 +132,40 @@ class OptimizedRAGEngine(BaseRAGEngine):
                 if not self.data_dir.exists():
                     raise FileNotFoundError(f"Data directory not found: {self.data_dir}")
 
-                # Load documents
-                documents = SimpleDirectoryReader(
-                    str(self.data_dir),
-                    required_exts=[".pdf"]
-                ).load_data()
-
-                if not documents:
+                pdf_paths = sorted(
+                    path for path in self.data_dir.iterdir()
+                    if path.suffix.lower() == ".pdf" and not path.name.startswith(".")
+                )
+                if not pdf_paths:
                     raise ValueError(f"No PDF files found in {self.data_dir}")
 
-                logger.info(f"✓ Loaded {len(documents)} documents")
-
-                # Create index with retry logic for rate limits
+                # Parse PDFs on a thread pool and embed each one as soon as it is
+                # ready, so parsing overlaps the embedding calls and their
+                # rate-limit waits instead of running strictly before them
                 logger.info("⚙️ Creating index with optimized settings...")
-                
-                retry_count = 0
-                while retry_count < max_retries:
-                    try:
-                        self.index = VectorStoreIndex.from_documents(
-                            documents,
-                            show_progress=True
-                        )
-                        break  # Success!
-                        
-                    except Exception as e:
-                        error_msg = str(e).lower()
-                        if "rate_limit" in error_msg or "429" in error_msg:
-                            retry_count += 1
-                            if retry_count < max_retries:
-                                wait_time = 10 * retry_count  # Exponential backoff
-                                logger.warning(
-                                    f"⚠️ Rate limit hit (attempt {retry_count}/{max_retries}). "
-                                    f"Waiting {wait_time} seconds..."
-                                )
-                                time.sleep(wait_time)
-                            else:
-                                logger.error(
-                                    "❌ Max retries reached. Please try again later or reduce the number of PDFs."
-                                )
-                                raise
+                self.index = None
+                document_count = 0
+                with ThreadPoolExecutor(max_workers=min(len(pdf_paths), os.cpu_count() or 1)) as pool:
+                    futures = [pool.submit(self._load_pdf, path) for path in pdf_paths]
+                    for future in as_completed(futures):
+                        documents = future.result()
+                        if not documents:
+                            continue
+                        document_count += len(documents)
+                        if self.index is None:
+                            self.index = self._with_rate_limit_retry(
+                                lambda: VectorStoreIndex.from_documents(documents, show_progress=True),
+                                max_retries
+                            )
                         else:
-                            raise
+                            # Retry per document so a retry never re-inserts earlier ones
+                            for document in documents:
+                                self._with_rate_limit_retry(lambda: self.index.insert(document), max_retries)
+
+                if self.index is None:
+                    raise ValueError(f"No documents could be loaded from {self.data_dir}")
+
+                logger.info(f"✓ Indexed {document_count} documents")
 
                 # Persist for future use
                 self.persist_dir.mkdir(exist_ok=True)
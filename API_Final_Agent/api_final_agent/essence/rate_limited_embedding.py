@@ -1,91 +1,425 @@
 """
 Rate-Limited Embedding Wrapper
-Prevents hitting OpenAI rate limits by adding delays between requests
+Prevents hitting OpenAI rate limits by throttling and retrying requests
 """
 
+import re
 import time
-from typing import List
+import asyncio
+import random
+import sqlite3
+import hashlib
+import threading
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple, Union
 from llama_index.embeddings.openai import OpenAIEmbedding
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Go-style durations used by x-ratelimit-reset-* headers, e.g. "1s", "6m0s", "20ms"
+_DURATION_RE = re.compile(r"(\d+(?:\.\d+)?)(ms|s|m|h)")
+_DURATION_UNITS = {"ms": 0.001, "s": 1.0, "m": 60.0, "h": 3600.0}
+
+
+def _parse_duration(value: str) -> Optional[float]:
+    """Parse a Retry-After / reset header value into seconds."""
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = _DURATION_RE.findall(value)
+    if not parts:
+        return None
+    return sum(float(amount) * _DURATION_UNITS[unit] for amount, unit in parts)
+
+
+def _is_rate_limit_error(error: Exception) -> bool:
+    return getattr(error, "status_code", None) == 429 or \
+        "rate_limit" in str(error).lower() or "429" in str(error)
+
+
+def _server_retry_after(error: Exception) -> Optional[float]:
+    """Seconds the server asked us to wait, if its response says so."""
+    headers = getattr(getattr(error, "response", None), "headers", None)
+    if not headers:
+        return None
+    for name in ("retry-after", "x-ratelimit-reset-requests", "x-ratelimit-reset-tokens"):
+        value = headers.get(name)
+        if value:
+            seconds = _parse_duration(value)
+            if seconds is not None:
+                return seconds
+    return None
+
+
+class EmbeddingCache:
+    """
+    Content-addressed, disk-backed store of text embeddings.
+
+    Vectors are keyed by a hash of the model name and the chunk text and
+    stored as float32 blobs in SQLite, so unchanged chunks never hit the
+    embedding API again when an index is rebuilt.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (hash BLOB PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model: str, text: str) -> bytes:
+        """Hash a chunk together with the model that embeds it."""
+        return hashlib.blake2b(f"{model}\0{text}".encode("utf-8"), digest_size=16).digest()
+
+    def get_many(self, keys: Sequence[bytes]) -> Dict[bytes, List[float]]:
+        """Return cached vectors for whichever keys are present."""
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit
+            for i in range(0, len(unique), 500):
+                chunk = unique[i:i + 500]
+                rows = self._conn.execute(
+                    f"SELECT hash, vector FROM embeddings WHERE hash IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array('f', blob).tolist()
+        return found
+
+    def put_many(self, items: Dict[bytes, Sequence[float]]):
+        """Store vectors in a single transaction."""
+        if not items:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO embeddings (hash, vector) VALUES (?, ?)",
+                [(key, array('f', vector).tobytes()) for key, vector in items.items()]
+            )
+
+
+class MemoryEmbeddingCache:
+    """
+    Bounded in-process LRU of embeddings keyed like EmbeddingCache.
+
+    Vectors are held as float32 arrays, a fraction of the size of lists of
+    Python floats, and repeated texts within a run are served without a
+    network round trip or a SQLite lookup.
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[bytes, array]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: Sequence[bytes]) -> Dict[bytes, List[float]]:
+        """Return cached vectors for whichever keys are present."""
+        found = {}
+        with self._lock:
+            for key in keys:
+                vector = self._entries.get(key)
+                if vector is not None:
+                    self._entries.move_to_end(key)
+                    found[key] = vector.tolist()
+        return found
+
+    def put_many(self, items: Dict[bytes, Sequence[float]]):
+        """Store vectors, evicting the least recently used beyond maxsize."""
+        if self.maxsize <= 0:
+            return
+        with self._lock:
+            for key, vector in items.items():
+                self._entries[key] = array('f', vector)
+                self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+class TokenBucket:
+    """
+    Thread-safe request/token budget that refills continuously.
+
+    Requests go out immediately while budget remains and only wait once the
+    per-minute request (rpm) or token (tpm) allowance is used up. `burst`
+    caps how many requests may go out back to back (defaults to rpm).
+    """
+
+    def __init__(self, rpm: float, tpm: Optional[int] = None, burst: Optional[float] = None):
+        if rpm <= 0:
+            raise ValueError(f"rpm must be positive, got {rpm}")
+        self.rpm = rpm
+        self.tpm = tpm
+        self.burst = float(burst) if burst else float(rpm)
+        self._requests = self.burst
+        self._tokens = float(tpm) if tpm else 0.0
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int = 0):
+        """Block until one request (and `tokens` tokens, capped at tpm) fit the budget."""
+        if self.tpm:
+            tokens = min(tokens, self.tpm)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                elapsed = now - self._updated
+                self._updated = now
+                self._requests = min(self.burst, self._requests + elapsed * self.rpm / 60)
+                if self.tpm:
+                    self._tokens = min(self.tpm, self._tokens + elapsed * self.tpm / 60)
+                
+                wait = max(0.0, (1 - self._requests) * 60 / self.rpm)
+                if self.tpm:
+                    wait = max(wait, (tokens - self._tokens) * 60 / self.tpm)
+                if wait <= 0:
+                    self._requests -= 1
+                    if self.tpm:
+                        self._tokens -= tokens
+                    return
+            logger.info(f"⏳ Rate limiting: waiting {wait:.2f}s for quota...")
+            time.sleep(wait)
+
+
+class _RateLimitState:
+    """Plain holder for RateLimitedEmbedding's settings, outside Pydantic."""
+    
+    __slots__ = (
+        'delay_seconds', 'max_concurrency', 'rate_limit_retries', 'backoff_cap',
+        'memory_cache', 'embedding_cache', 'rate_limiter'
+    )
+
 
 class RateLimitedEmbedding(OpenAIEmbedding):
     """
-    Wrapper around OpenAIEmbedding that adds delays between requests
-    to prevent rate limit errors.
+    Wrapper around OpenAIEmbedding that throttles requests through a
+    TokenBucket to prevent rate limit errors.
+    
+    Pass a rate_limiter matching the account's actual quota; otherwise a
+    bucket refilling one request per delay_seconds (with a small burst
+    allowance) is used; delay_seconds <= 0 disables throttling. Each batch of embed_batch_size texts costs one request.
     """
     
-    def __init__(self, delay_seconds: float = 2.0, **kwargs):
+    def __init__(
+        self,
+        delay_seconds: float = 2.0,
+        burst: int = 3,
+        max_concurrency: int = 4,
+        rate_limit_retries: int = 25,
+        backoff_cap: float = 60.0,
+        memory_cache_size: int = 4096,
+        cache: Optional[EmbeddingCache] = None,
+        rate_limiter: Optional[TokenBucket] = None,
+        **kwargs
+    ):
         """
         Initialize with rate limiting.
         
         Args:
-            delay_seconds: Seconds to wait between embedding requests
+            delay_seconds: Average seconds between requests for the default limiter
+                (0 or less for no limiter)
+            burst: Requests the default limiter allows back to back
+            max_concurrency: Batches allowed in flight at once
+            rate_limit_retries: Attempts per batch after a 429 before giving up
+            backoff_cap: Upper bound in seconds for a single backoff sleep
+            memory_cache_size: Embeddings kept in the in-process LRU (0 disables it)
+            cache: Optional persistent cache consulted before calling the API
+            rate_limiter: Optional quota-based limiter replacing the default one
             **kwargs: Arguments to pass to OpenAIEmbedding
         """
         super().__init__(**kwargs)
-        # Use object.__setattr__ to bypass Pydantic validation
-        object.__setattr__(self, 'delay_seconds', delay_seconds)
-        object.__setattr__(self, 'last_request_time', 0)
-        
-    def _wait_if_needed(self):
-        """Wait if we're making requests too quickly."""
-        current_time = time.time()
-        delay_seconds = object.__getattribute__(self, 'delay_seconds')
-        last_request_time = object.__getattribute__(self, 'last_request_time')
-        time_since_last = current_time - last_request_time
-        
-        if time_since_last < delay_seconds:
-            wait_time = delay_seconds - time_since_last
-            logger.info(f"⏳ Rate limiting: waiting {wait_time:.2f}s...")
-            time.sleep(wait_time)
+        if rate_limiter is None and delay_seconds > 0:
+            rate_limiter = TokenBucket(rpm=60 / delay_seconds, burst=burst)
+        state = _RateLimitState()
+        state.delay_seconds = delay_seconds
+        state.max_concurrency = max(1, max_concurrency)
+        state.rate_limit_retries = rate_limit_retries
+        state.backoff_cap = backoff_cap
+        state.memory_cache = MemoryEmbeddingCache(memory_cache_size)
+        state.embedding_cache = cache
+        state.rate_limiter = rate_limiter
+        # Use object.__setattr__ to bypass Pydantic validation; the state is
+        # then read back with ordinary attribute access
+        object.__setattr__(self, '_rl', state)
         
-        object.__setattr__(self, 'last_request_time', time.time())
+    def _wait_if_needed(self, texts: Sequence[str] = ()):
+        """Wait until the limiter has budget for one request covering `texts`."""
+        limiter = self._rl.rate_limiter
+        if limiter is not None:
+            # Rough token estimate: ~4 characters per token
+            limiter.acquire(sum(len(text) for text in texts) // 4)
     
     def get_text_embedding(self, text: str) -> List[float]:
-        """Get embedding for a single text with rate limiting."""
-        self._wait_if_needed()
-        return super().get_text_embedding(text)
+        """Get embedding for a single text with caching and rate limiting."""
+        return self.get_text_embedding_batch([text])[0]
     
     def get_text_embedding_batch(
         self, texts: List[str], show_progress: bool = False
     ) -> List[List[float]]:
-        """Get embeddings for multiple texts with rate limiting."""
-        self._wait_if_needed()
+        """Get embeddings for multiple texts, embedding only cache misses."""
+        keys = [EmbeddingCache.make_key(self.model_name, text) for text in texts]
+        vectors = self._cached_vectors(keys)
         
-        # Process in smaller batches with delays
-        batch_size = 5  # Very conservative
-        all_embeddings = []
+        missing = self._missing_texts(keys, texts, vectors)
+        if missing:
+            fresh = dict(zip(missing, self._embed_batch_rate_limited(list(missing.values()))))
+            self._store_vectors(fresh)
+            vectors.update(fresh)
         
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i:i + batch_size]
-            logger.info(f"📊 Processing batch {i//batch_size + 1}/{(len(texts)-1)//batch_size + 1} ({len(batch)} texts)")
-            
+        return [vectors[key] for key in keys]
+    
+    def _cached_vectors(self, keys: List[bytes]) -> Dict[bytes, List[float]]:
+        """Look keys up in the memory LRU, then in the persistent cache."""
+        memory = self._rl.memory_cache
+        cache = self._rl.embedding_cache
+        vectors = memory.get_many(keys)
+        if cache is not None and len(vectors) < len(keys):
+            stored = cache.get_many([key for key in keys if key not in vectors])
+            memory.put_many(stored)
+            vectors.update(stored)
+        return vectors
+    
+    def _store_vectors(self, fresh: Dict[bytes, List[float]]):
+        """Record newly embedded vectors in both caches."""
+        self._rl.memory_cache.put_many(fresh)
+        if self._rl.embedding_cache is not None:
+            self._rl.embedding_cache.put_many(fresh)
+    
+    @staticmethod
+    def _missing_texts(
+        keys: List[bytes], texts: List[str], vectors: Dict[bytes, List[float]]
+    ) -> Dict[bytes, str]:
+        """Distinct uncached texts by key, so each is embedded once."""
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in vectors:
+                missing.setdefault(key, text)
+        if missing:
+            logger.info(f"💾 Embedding cache: {len(texts) - len(missing)} hits, {len(missing)} to embed")
+        return missing
+    
+    def _batches(self, texts: List[str]) -> List[List[str]]:
+        """Split texts into API-sized batches; each one costs one request."""
+        batch_size = self.embed_batch_size
+        return [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+    
+    def _embed_batch_rate_limited(self, texts: List[str]) -> List[List[float]]:
+        """
+        Call the embedding API in rate-limited batches.
+        
+        Batches run concurrently (up to max_concurrency) while the limiter
+        keeps the overall request rate inside the quota.
+        """
+        batches = self._batches(texts)
+        workers = min(self._rl.max_concurrency, len(batches))
+        
+        if workers <= 1:
+            results = [self._embed_subbatch(batch) for batch in batches]
+        else:
+            logger.info(f"📊 Embedding {len(texts)} texts in {len(batches)} batches ({workers} concurrent)")
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(self._embed_subbatch, batches))
+        
+        return [embedding for batch_embeddings in results for embedding in batch_embeddings]
+    
+    def _embed_subbatch(self, batch: List[str]) -> List[List[float]]:
+        """
+        Embed one batch once the limiter allows it.
+        
+        On a 429 the batch is retried after the server's Retry-After /
+        x-ratelimit-reset-* hint, falling back to exponential backoff with
+        decorrelated jitter when the response carries none.
+        """
+        backoff = 1.0
+        attempt = 0
+        while True:
             try:
-                embeddings = super().get_text_embedding_batch(batch, show_progress=False)
-                all_embeddings.extend(embeddings)
-                
-                # Add delay between batches
-                if i + batch_size < len(texts):
-                    delay_seconds = object.__getattribute__(self, 'delay_seconds')
-                    logger.info(f"⏳ Waiting {delay_seconds}s before next batch...")
-                    time.sleep(delay_seconds)
+                self._wait_if_needed(batch)
+                return super().get_text_embedding_batch(batch, show_progress=False)
                     
             except Exception as e:
-                if "rate_limit" in str(e).lower() or "429" in str(e):
-                    logger.warning(f"⚠️ Rate limit hit, waiting 10 seconds...")
-                    time.sleep(10)
-                    # Retry this batch
-                    embeddings = super().get_text_embedding_batch(batch, show_progress=False)
-                    all_embeddings.extend(embeddings)
-                else:
+                retry = self._rate_limit_backoff(e, attempt, backoff)
+                if retry is None:
                     raise
+                wait, backoff = retry
+                attempt += 1
+                time.sleep(wait)
+    
+    def _rate_limit_backoff(
+        self, error: Exception, attempt: int, backoff: float
+    ) -> Optional[Tuple[float, float]]:
+        """
+        Decide how to retry a failed batch.
         
-        return all_embeddings
+        Returns (seconds to wait, next backoff) for a 429 with retries left,
+        or None when the error should be raised.
+        """
+        retries = self._rl.rate_limit_retries
+        if not _is_rate_limit_error(error) or attempt >= retries:
+            return None
+        cap = self._rl.backoff_cap
+        backoff = min(cap, random.uniform(1.0, backoff * 3))
+        retry_after = _server_retry_after(error)
+        wait = min(cap, retry_after + random.uniform(0, 0.5)) if retry_after is not None else backoff
+        logger.warning(f"⚠️ Rate limit hit, retry {attempt + 1}/{retries} in {wait:.2f}s...")
+        return wait, backoff
     
     async def aget_text_embedding(self, text: str) -> List[float]:
-        """Async version with rate limiting."""
-        self._wait_if_needed()
-        return await super().aget_text_embedding(text)
+        """Async version with caching and rate limiting."""
+        return (await self.aget_text_embedding_batch([text]))[0]
+    
+    async def aget_text_embedding_batch(
+        self, texts: List[str], show_progress: bool = False
+    ) -> List[List[float]]:
+        """Async batch version of get_text_embedding_batch."""
+        keys = [EmbeddingCache.make_key(self.model_name, text) for text in texts]
+        # SQLite lookups and writes block, so they run on a worker thread
+        if self._rl.embedding_cache is not None:
+            vectors = await asyncio.to_thread(self._cached_vectors, keys)
+        else:
+            vectors = self._cached_vectors(keys)
+        
+        missing = self._missing_texts(keys, texts, vectors)
+        if missing:
+            semaphore = asyncio.Semaphore(self._rl.max_concurrency)
+            
+            async def embed(batch: List[str]) -> List[List[float]]:
+                async with semaphore:
+                    return await self._aembed_subbatch(batch)
+            
+            results = await asyncio.gather(*(embed(batch) for batch in self._batches(list(missing.values()))))
+            fresh = dict(zip(missing, (embedding for batch in results for embedding in batch)))
+            if self._rl.embedding_cache is not None:
+                await asyncio.to_thread(self._store_vectors, fresh)
+            else:
+                self._store_vectors(fresh)
+            vectors.update(fresh)
+        
+        return [vectors[key] for key in keys]
+    
+    async def _aembed_subbatch(self, batch: List[str]) -> List[List[float]]:
+        """Async _embed_subbatch: one limiter token per batch, same 429 retries."""
+        backoff = 1.0
+        attempt = 0
+        while True:
+            try:
+                # The limiter sleeps while it waits, so keep it off the event loop
+                await asyncio.to_thread(self._wait_if_needed, batch)
+                return await super().aget_text_embedding_batch(batch, show_progress=False)
+                    
+            except Exception as e:
+                retry = self._rate_limit_backoff(e, attempt, backoff)
+                if retry is None:
+                    raise
+                wait, backoff = retry
+                attempt += 1
+                await asyncio.sleep(wait)
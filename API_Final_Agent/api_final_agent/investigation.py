@@ -4,137 +4,229 @@ Runs ACE and Essence pipelines internally to capture raw outputs.
 Phase 2: Understanding output structures before creating unified format.
 """
 
-import json
+import io
+import time
 import asyncio
+from collections import deque
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Awaitable, Callable, Dict, Any, Iterator, List, Optional, Sequence, Tuple
 from datetime import datetime
 
 from api_final_agent.pipelines.ace_pipeline import run_ace_analysis
 from api_final_agent.pipelines.essence_pipeline import run_essence_analysis
+from api_final_agent.utils.json_serializer import dumps_indented, json_loads
 
 ARTIFACTS_DIR = Path(__file__).parent.parent.parent / "artifacts"
 ARTIFACTS_DIR.mkdir(exist_ok=True)
 
+# Scenarios allowed to run against the pipelines at once
+INVESTIGATION_CONCURRENCY = 4
+
+# Raw outputs younger than this are reused instead of re-running the scenario
+ARTIFACT_TTL_SECONDS = 24 * 60 * 60
+
+
+def _walk(data: Any) -> Iterator[Tuple[str, Any]]:
+    """
+    Yield (dotted_path, value) for every object entry in a JSON structure.
+    
+    Lists are followed through their first item only, which appears in
+    paths as "[0]".
+    """
+    queue = deque([(data, "")])
+    while queue:
+        obj, path = queue.popleft()
+        if isinstance(obj, dict):
+            for key, value in obj.items():
+                new_path = f"{path}.{key}" if path else key
+                yield new_path, value
+                if isinstance(value, (dict, list)):
+                    queue.append((value, new_path))
+        elif isinstance(obj, list) and obj:
+            queue.append((obj[0], f"{path}[0]"))
+
 
 def analyze_schema(data: Any, path: str = "", max_depth: int = 5) -> Dict[str, Any]:
     """
-    Recursively analyze JSON structure to extract schema information.
+    Analyze JSON structure to extract schema information.
+    
+    Walks the structure breadth-first with an explicit queue, filling each
+    node into its parent's slot, so deep outputs cost no Python recursion.
     """
-    if max_depth <= 0:
-        return {"type": "max_depth_reached", "path": path}
-    
-    if isinstance(data, dict):
-        schema = {
-            "type": "object",
-            "path": path,
-            "keys": {},
-            "key_count": len(data)
-        }
-        for key, value in data.items():
-            new_path = f"{path}.{key}" if path else key
-            schema["keys"][key] = analyze_schema(value, new_path, max_depth - 1)
-        return schema
-    elif isinstance(data, list):
-        schema = {
-            "type": "array",
-            "path": path,
-            "length": len(data),
-            "item_schema": None
-        }
-        if data:
-            schema["item_schema"] = analyze_schema(data[0], f"{path}[0]", max_depth - 1)
-        return schema
-    else:
-        return {
-            "type": type(data).__name__,
-            "path": path,
-            "sample_value": str(data)[:100] if data is not None else None
-        }
+    result: Dict[Any, Any] = {}
+    queue = deque([(data, path, max_depth, result, None)])
+    while queue:
+        obj, obj_path, depth, parent, slot = queue.popleft()
+        if depth <= 0:
+            node = {"type": "max_depth_reached", "path": obj_path}
+        elif isinstance(obj, dict):
+            node = {
+                "type": "object",
+                "path": obj_path,
+                "keys": {},
+                "key_count": len(obj)
+            }
+            keys = node["keys"]
+            for key, value in obj.items():
+                # Reserve the slot so keys keep their original order
+                keys[key] = None
+                new_path = f"{obj_path}.{key}" if obj_path else key
+                queue.append((value, new_path, depth - 1, keys, key))
+        elif isinstance(obj, list):
+            node = {
+                "type": "array",
+                "path": obj_path,
+                "length": len(obj),
+                "item_schema": None
+            }
+            if obj:
+                queue.append((obj[0], f"{obj_path}[0]", depth - 1, node, "item_schema"))
+        else:
+            node = {
+                "type": type(obj).__name__,
+                "path": obj_path,
+                "sample_value": str(obj)[:100] if obj is not None else None
+            }
+        parent[slot] = node
+    return result[None]
 
 
-def generate_schema_report(samples: List[Dict[str, Any]], pipeline_name: str) -> str:
-    """Generate markdown schema report from sample responses."""
-    report_lines = [
-        f"# {pipeline_name} Pipeline Schema Report",
-        f"Generated: {datetime.now().isoformat()}",
-        f"Number of samples analyzed: {len(samples)}",
-        ""
-    ]
+SchemaKeys = Tuple[set, Dict[str, str], Dict[str, Optional[str]]]
+
+
+def collect_schema_keys(samples: List[Dict[str, Any]], keys: Optional[SchemaKeys] = None) -> SchemaKeys:
+    """
+    Walk samples once, collecting (all_keys, key_types, key_examples).
     
-    # Collect all unique keys
-    all_keys = set()
-    key_types = {}
-    key_examples = {}
+    Pass a previous result as `keys` to extend it with more samples; the
+    first type and example seen for each path are kept.
+    """
+    all_keys, key_types, key_examples = keys if keys is not None else (set(), {}, {})
+    for sample in samples:
+        for key_path, value in _walk(sample):
+            all_keys.add(key_path)
+            if not isinstance(value, (dict, list)):
+                key_types.setdefault(key_path, type(value).__name__)
+                key_examples.setdefault(key_path, None if value is None else str(value)[:100])
+    return all_keys, key_types, key_examples
+
+
+def generate_schema_report(
+    samples: List[Dict[str, Any]],
+    pipeline_name: str,
+    keys: Optional[SchemaKeys] = None
+) -> str:
+    """
+    Generate markdown schema report from sample responses.
     
-    def collect_keys(data: Any, path: str = ""):
-        if isinstance(data, dict):
-            for key, value in data.items():
-                new_path = f"{path}.{key}" if path else key
-                all_keys.add(new_path)
-                if isinstance(value, (dict, list)):
-                    collect_keys(value, new_path)
-                else:
-                    value_type = type(value).__name__
-                    if new_path not in key_types:
-                        key_types[new_path] = value_type
-                        key_examples[new_path] = str(value)[:100] if value is not None else None
-        elif isinstance(data, list) and data:
-            collect_keys(data[0], f"{path}[0]")
+    `keys` may carry the result of collect_schema_keys for these samples,
+    so the samples are not walked again.
+    """
+    buf = io.StringIO()
+    w = buf.write
+    w(f"# {pipeline_name} Pipeline Schema Report\n"
+      f"Generated: {datetime.now().isoformat()}\n"
+      f"Number of samples analyzed: {len(samples)}\n\n")
     
-    for sample in samples:
-        collect_keys(sample)
+    all_keys, key_types, key_examples = keys if keys is not None else collect_schema_keys(samples)
+    
+    def write_keys(keys):
+        for key in keys:
+            w(f"- `{key}`: {key_types.get(key, 'unknown')}\n")
+            example = key_examples.get(key, "N/A")
+            if example and example != "None":
+                w(f"  - Example: `{example[:80]}...`\n" if len(example) > 80 else f"  - Example: `{example}`\n")
     
     # Top-level keys
-    report_lines.extend(["## Top-Level Keys", ""])
-    top_level_keys = sorted([k for k in all_keys if '.' not in k])
-    for key in top_level_keys:
-        key_type = key_types.get(key, "unknown")
-        example = key_examples.get(key, "N/A")
-        report_lines.append(f"- `{key}`: {key_type}")
-        if example and example != "None":
-            report_lines.append(f"  - Example: `{example[:80]}...`" if len(example) > 80 else f"  - Example: `{example}`")
+    w("## Top-Level Keys\n\n")
+    write_keys(sorted([k for k in all_keys if '.' not in k]))
     
     # Nested keys
-    report_lines.extend(["", "## Nested Keys (Dot Notation)", ""])
-    nested_keys = sorted([k for k in all_keys if '.' in k])
-    for key in nested_keys:
-        key_type = key_types.get(key, "unknown")
-        example = key_examples.get(key, "N/A")
-        report_lines.append(f"- `{key}`: {key_type}")
-        if example and example != "None":
-            report_lines.append(f"  - Example: `{example[:80]}...`" if len(example) > 80 else f"  - Example: `{example}`")
+    w("\n## Nested Keys (Dot Notation)\n\n")
+    write_keys(sorted([k for k in all_keys if '.' in k]))
     
     # Sample snippet
-    report_lines.extend(["", "## Sample Response Snippet", "", "```json"])
+    w("\n## Sample Response Snippet\n\n```json\n")
     if samples:
-        sample_json = json.dumps(samples[0], indent=2, ensure_ascii=False)
+        sample_json = dumps_indented(samples[0]).decode('utf-8')
         if len(sample_json) > 2000:
             sample_json = sample_json[:2000] + "\n... (truncated)"
-        report_lines.append(sample_json)
-    report_lines.extend(["```", ""])
+        w(sample_json)
+        w("\n")
+    w("```\n")
     
-    return "\n".join(report_lines)
+    return buf.getvalue()
+
+
+def _write_json(path: Path, obj: Any):
+    """Write obj as pretty-printed UTF-8 JSON."""
+    path.write_bytes(dumps_indented(obj))
 
 
-async def investigate_outputs() -> Dict[str, Any]:
+async def _investigate_scenario(
+    semaphore: asyncio.Semaphore,
+    prefix: str,
+    index: int,
+    scenario: Dict[str, Any],
+    run: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+    error_fields: Sequence[str] = (),
+    force: bool = False
+) -> Optional[Dict[str, Any]]:
+    """
+    Run one scenario and save its raw output (or error) to ARTIFACTS_DIR.
+    
+    A raw output saved less than ARTIFACT_TTL_SECONDS ago is loaded
+    instead, unless `force` is set.
+    """
+    filepath = ARTIFACTS_DIR / f"{prefix}_raw_{index}.json"
+    if not force:
+        try:
+            fresh = time.time() - filepath.stat().st_mtime < ARTIFACT_TTL_SECONDS
+        except OSError:
+            fresh = False
+        if fresh:
+            try:
+                result = json_loads(await asyncio.to_thread(filepath.read_bytes))
+            except (OSError, ValueError):
+                pass
+            else:
+                print(f"♻️  Reusing {filepath} ({prefix} scenario {index}: {scenario['name']})")
+                return result
+    
+    async with semaphore:
+        print(f"\n--- {prefix.upper()} scenario {index}: {scenario['name']} ---")
+        try:
+            result = await run(scenario)
+        except Exception as e:
+            print(f"❌ Error ({prefix} scenario {index}): {e}")
+            error_result = {
+                "scenario": scenario['name'],
+                "error": str(e)
+            }
+            error_result.update((field, scenario[field]) for field in error_fields)
+            error_path = ARTIFACTS_DIR / f"{prefix}_raw_{index}_error.json"
+            # Serialize and write off the event loop so other scenarios keep running
+            await asyncio.to_thread(_write_json, error_path, error_result)
+            return None
+    
+    await asyncio.to_thread(_write_json, filepath, result)
+    print(f"✅ Saved: {filepath}")
+    return result
+
+
+async def investigate_outputs(force: bool = False) -> Dict[str, Any]:
     """
     Run internal investigation of ACE and Essence pipelines.
     Captures raw outputs and generates schema reports.
+    
+    Scenarios with a fresh raw output on disk are not re-run; pass
+    force=True to run every scenario.
     """
     print("=" * 80)
     print("Phase 2: Internal Pipeline Investigation")
     print("=" * 80)
     print()
     
-    ace_samples = []
-    essence_samples = []
-    
-    # ACE Investigation Scenarios
-    print("\n" + "=" * 80)
-    print("ACE Pipeline Investigation")
-    print("=" * 80)
-    
     ace_scenarios = [
         {
             "name": "Valid barcode + short objective",
@@ -148,37 +240,6 @@ async def investigate_outputs() -> Dict[str, Any]:
         }
     ]
     
-    for i, scenario in enumerate(ace_scenarios, 1):
-        print(f"\n--- Scenario {i}: {scenario['name']} ---")
-        try:
-            result = await run_ace_analysis(
-                barcode=scenario['barcode'],
-                business_objective=scenario['business_objective']
-            )
-            filename = f"ace_raw_{i}.json"
-            filepath = ARTIFACTS_DIR / filename
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(result, f, indent=2, ensure_ascii=False)
-            print(f"✅ Saved: {filepath}")
-            ace_samples.append(result)
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            error_result = {
-                "scenario": scenario['name'],
-                "error": str(e),
-                "barcode": scenario['barcode'],
-                "business_objective": scenario['business_objective']
-            }
-            filename = f"ace_raw_{i}_error.json"
-            filepath = ARTIFACTS_DIR / filename
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(error_result, f, indent=2, ensure_ascii=False)
-    
-    # Essence Investigation Scenarios
-    print("\n" + "=" * 80)
-    print("Essence Pipeline Investigation")
-    print("=" * 80)
-    
     essence_scenarios = [
         {
             "name": "Product description + objective",
@@ -192,30 +253,41 @@ async def investigate_outputs() -> Dict[str, Any]:
         }
     ]
     
-    for i, scenario in enumerate(essence_scenarios, 1):
-        print(f"\n--- Scenario {i}: {scenario['name']} ---")
-        try:
-            result = await run_essence_analysis(
-                product_link=scenario.get('product_link'),
-                product_description=scenario.get('product_description'),
-                business_objective=scenario['business_objective']
-            )
-            filename = f"essence_raw_{i}.json"
-            filepath = ARTIFACTS_DIR / filename
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(result, f, indent=2, ensure_ascii=False)
-            print(f"✅ Saved: {filepath}")
-            essence_samples.append(result)
-        except Exception as e:
-            print(f"❌ Error: {e}")
-            error_result = {
-                "scenario": scenario['name'],
-                "error": str(e)
-            }
-            filename = f"essence_raw_{i}_error.json"
-            filepath = ARTIFACTS_DIR / filename
-            with open(filepath, 'w', encoding='utf-8') as f:
-                json.dump(error_result, f, indent=2, ensure_ascii=False)
+    # Scenarios are independent, so they run concurrently: Essence analyses
+    # and ACE lookups run on worker threads, while ACE pipeline runs queue on
+    # a single worker because they share the playbook
+    print("\n" + "=" * 80)
+    print("ACE and Essence Pipeline Investigation")
+    print("=" * 80)
+    
+    semaphore = asyncio.Semaphore(INVESTIGATION_CONCURRENCY)
+    ace_tasks = [
+        _investigate_scenario(
+            semaphore, "ace", i, scenario,
+            lambda s: run_ace_analysis(
+                barcode=s['barcode'],
+                business_objective=s['business_objective']
+            ),
+            error_fields=("barcode", "business_objective"),
+            force=force
+        )
+        for i, scenario in enumerate(ace_scenarios, 1)
+    ]
+    essence_tasks = [
+        _investigate_scenario(
+            semaphore, "essence", i, scenario,
+            lambda s: run_essence_analysis(
+                product_link=s.get('product_link'),
+                product_description=s.get('product_description'),
+                business_objective=s['business_objective']
+            ),
+            force=force
+        )
+        for i, scenario in enumerate(essence_scenarios, 1)
+    ]
+    results = await asyncio.gather(*ace_tasks, *essence_tasks)
+    ace_samples = [r for r in results[:len(ace_tasks)] if r is not None]
+    essence_samples = [r for r in results[len(ace_tasks):] if r is not None]
     
     # Generate schema reports
     print("\n" + "=" * 80)
@@ -225,15 +297,13 @@ async def investigate_outputs() -> Dict[str, Any]:
     if ace_samples:
         ace_report = generate_schema_report(ace_samples, "ACE")
         report_path = ARTIFACTS_DIR / "ace_schema_report.md"
-        with open(report_path, 'w', encoding='utf-8') as f:
-            f.write(ace_report)
+        await asyncio.to_thread(report_path.write_text, ace_report, encoding='utf-8')
         print(f"✅ Generated: {report_path}")
     
     if essence_samples:
         essence_report = generate_schema_report(essence_samples, "Essence")
         report_path = ARTIFACTS_DIR / "essence_schema_report.md"
-        with open(report_path, 'w', encoding='utf-8') as f:
-            f.write(ace_report)
+        await asyncio.to_thread(report_path.write_text, essence_report, encoding='utf-8')
         print(f"✅ Generated: {report_path}")
     
     print("\n" + "=" * 80)
@@ -4,9 +4,14 @@ Simple wrapper to use BLACKBOX AI with OpenAI SDK
 """
 
 import os
+from typing import Dict
 from openai import OpenAI
 
 
+# One client (and connection pool) per key, reused across calls
+_CLIENTS: Dict[str, OpenAI] = {}
+
+
 def get_blackbox_client(api_key: str = None) -> OpenAI:
     """
     Get OpenAI client configured for BLACKBOX AI.
@@ -19,17 +24,20 @@ def get_blackbox_client(api_key: str = None) -> OpenAI:
         api_key: BLACKBOX API key (defaults to BLACKBOX_API_KEY env var)
         
     Returns:
-        OpenAI client configured for BLACKBOX
+        OpenAI client configured for BLACKBOX (shared per API key)
     """
     if api_key is None:
         api_key = os.getenv("BLACKBOX_API_KEY")
         if not api_key:
             raise ValueError("BLACKBOX_API_KEY not found in environment")
     
-    return OpenAI(
-        api_key=api_key,
-        base_url="https://api.blackbox.ai/v1"
-    )
+    client = _CLIENTS.get(api_key)
+    if client is None:
+        client = _CLIENTS.setdefault(api_key, OpenAI(
+            api_key=api_key,
+            base_url="https://api.blackbox.ai/v1"
+        ))
+    return client
 
 
 # Recommended models for different tasks
@@ -4,14 +4,22 @@ Runs ACE_Framework pipeline internally (no HTTP calls).
 """
 
 import os
+import re
 import sys
+import copy
+import time
+import asyncio
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from pathlib import Path
 from typing import Dict, Any, Optional
 
 # Import ACE components using relative imports
 from ..ace.config import ACEConfig, LLMConfig
 from ..ace.agents import ACEPipeline
-from ..ace.product_data import OpenFoodFactsClient, ImageAnalyzer
+from ..ace.product_data import OpenFoodFactsClient, ImageAnalyzer, NormalizedProductData
 from ..ace.competitor_data import get_competitor_intelligence
 from ..ace.marketing_strategy import generate_marketing_strategy
 from ..ace.research_insights import generate_research_insights
@@ -23,6 +31,57 @@ _ace_pipeline: Optional[ACEPipeline] = None
 _ace_image_analyzer: Optional[ImageAnalyzer] = None
 _ace_off_client = OpenFoodFactsClient()
 
+# ACEPipeline.run goes through this single worker: it keeps the event loop
+# free while the LLM calls run, and the Curator step, which updates the shared
+# playbook, still only ever runs one pipeline at a time
+_ACE_RUN_EXECUTOR = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ace-pipeline")
+
+# Products by barcode and image analyses by URL, so repeated runs on the same
+# product skip the OpenFoodFacts lookup and the image revalidation round trip
+_LOOKUP_CACHE_SIZE = 1024
+_product_cache: "OrderedDict[str, NormalizedProductData]" = OrderedDict()
+_image_cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_lookup_cache_lock = threading.Lock()
+
+
+def _cache_get(cache: OrderedDict, key: str):
+    with _lookup_cache_lock:
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+
+def _cache_put(cache: OrderedDict, key: str, value):
+    with _lookup_cache_lock:
+        cache[key] = value
+        cache.move_to_end(key)
+        if len(cache) > _LOOKUP_CACHE_SIZE:
+            cache.popitem(last=False)
+
+
+def _get_product(barcode: str) -> Optional[NormalizedProductData]:
+    """OpenFoodFacts lookup, memoized per barcode (misses are not cached)."""
+    product = _cache_get(_product_cache, barcode)
+    if product is None:
+        product = _ace_off_client.get_product_by_barcode(barcode)
+        if product is not None:
+            _cache_put(_product_cache, barcode, product)
+    return product
+
+
+def _analyze_image(image_url: str) -> Dict[str, Any]:
+    """Image analysis as a dict, memoized per URL when it produced findings."""
+    cached = _cache_get(_image_cache, image_url)
+    if cached is None:
+        result = _ace_image_analyzer.analyze_from_url(image_url)
+        cached = result.to_dict()
+        # Failures come back as placeholder results; only keep real analyses
+        if result.observations or result.problemes_detectes or result.attractiveness_improvements:
+            _cache_put(_image_cache, image_url, cached)
+    # Callers embed the dict in their result, so hand out a private copy
+    return copy.deepcopy(cached)
+
 
 def _initialize_ace_pipeline():
     """Initialize ACE pipeline if not already initialized."""
@@ -48,6 +107,40 @@ def _initialize_ace_pipeline():
     print(f"✅ ACE pipeline initialized with {provider}")
 
 
+# List numbering ("1.", "2)") followed by bullet markers ("•", "-", "*")
+_INSIGHT_PREFIX_RE = re.compile(r'^[0-9.\-) ]*[•\-* ]*')
+
+
+def _format_key_insights(key_insights):
+    """Format key_insights from string to list."""
+    if not key_insights:
+        return []
+    if isinstance(key_insights, list):
+        return key_insights
+    if isinstance(key_insights, str):
+        if '\n' in key_insights:
+            cleaned = []
+            for line in key_insights.split('\n'):
+                line = line.strip()
+                if line and not line.startswith('#'):
+                    line = _INSIGHT_PREFIX_RE.sub('', line, count=1)
+                    if line:
+                        cleaned.append(line)
+            return cleaned if cleaned else [key_insights]
+        return [key_insights]
+    return []
+
+
+def _timed_competitor_intelligence(product_category: str) -> Dict[str, Any]:
+    """Competitor intelligence for a category, with the usual progress output."""
+    print(f"   Generating competitor intelligence...")
+    competitor_start = time.time()
+    competitor_intelligence = get_competitor_intelligence(product_category=product_category)
+    competitor_duration = time.time() - competitor_start
+    print(f"   ✅ Competitor intelligence generated in {competitor_duration:.1f}s")
+    return competitor_intelligence
+
+
 async def run_ace_analysis(
     barcode: str,
     business_objective: str
@@ -63,7 +156,6 @@ async def run_ace_analysis(
         Complete ACE analysis result as dict
     """
     # Initialize if needed
-    import time
     init_start = time.time()
     _initialize_ace_pipeline()
     init_duration = time.time() - init_start
@@ -73,79 +165,93 @@ async def run_ace_analysis(
     # 1. Lookup product from OpenFoodFacts
     print(f"   Looking up product from OpenFoodFacts...")
     off_start = time.time()
-    product = _ace_off_client.get_product_by_barcode(barcode)
+    product = _get_product(barcode)
     off_duration = time.time() - off_start
     print(f"   OpenFoodFacts lookup completed in {off_duration:.1f}s")
     
     if not product:
         raise ValueError(f"Product not found for barcode: {barcode}")
     
-    # 2. Analyze image if available
-    image_analysis = {}
-    if product.image_front_url and _ace_image_analyzer:
-        try:
-            print(f"   Analyzing product image...")
-            image_start = time.time()
-            image_result = _ace_image_analyzer.analyze_from_url(product.image_front_url)
-            image_analysis = image_result.to_dict()
-            image_duration = time.time() - image_start
-            print(f"   Image analysis completed in {image_duration:.1f}s")
-        except Exception as e:
-            print(f"⚠️  Image analysis failed: {e}")
-            print(f"   Continuing without image analysis...")
-            # Continue without image analysis - this is not critical
-            image_analysis = {}
-    
-    # 3. Run ACE pipeline
-    print(f"   Running ACE pipeline (this may take 30-120 seconds for LLM processing)...")
-    pipeline_start = time.time()
-    
-    # Serialize product data to ensure JSON compatibility
-    product_data_dict = make_json_serializable(product)
-    
-    pipeline_result = _ace_pipeline.run(
-        product_data=product_data_dict,
-        image_analysis=image_analysis,
-        business_objective=business_objective,
-        feedback=None
-    )
-    pipeline_duration = time.time() - pipeline_start
-    print(f"   ✅ ACE pipeline.run() completed in {pipeline_duration:.1f}s")
-    
-    # 4. Extract results
-    if hasattr(pipeline_result, 'to_dict'):
-        result_dict = pipeline_result.to_dict()
-        generator_output = result_dict.get("generator_output", {})
-        reflector_output = result_dict.get("reflector_output", {})
-    else:
-        generator_output = pipeline_result if isinstance(pipeline_result, dict) else {}
-        reflector_output = {}
-    
-    # 5. Serialize product data to ensure all nested objects are JSON-compatible
+    # Serialize product data once; the pipeline, generators and result all read it
     product_serialized = make_json_serializable(product)
     
-    # 6. Get competitor intelligence data
-    print(f"   Generating competitor intelligence...")
-    competitor_start = time.time()
-    competitor_intelligence = get_competitor_intelligence(
-        product_category=product_data_dict.get('plant_based_category', 'plant-based-burger')
+    # Competitor intelligence only needs the category, so it runs on a worker
+    # thread while the image is analyzed and the ACE pipeline runs
+    loop = asyncio.get_running_loop()
+    competitor_future = loop.run_in_executor(
+        None,
+        _timed_competitor_intelligence,
+        product_serialized.get('plant_based_category', 'plant-based-burger')
     )
-    competitor_duration = time.time() - competitor_start
-    print(f"   ✅ Competitor intelligence generated in {competitor_duration:.1f}s")
     
-    # 7. Generate marketing strategy
+    try:
+        # 2. Analyze image if available
+        image_analysis = {}
+        if product.image_front_url and _ace_image_analyzer:
+            try:
+                print(f"   Analyzing product image...")
+                image_start = time.time()
+                image_analysis = await loop.run_in_executor(None, _analyze_image, product.image_front_url)
+                image_duration = time.time() - image_start
+                print(f"   Image analysis completed in {image_duration:.1f}s")
+            except Exception as e:
+                print(f"⚠️  Image analysis failed: {e}")
+                print(f"   Continuing without image analysis...")
+                # Continue without image analysis - this is not critical
+                image_analysis = {}
+        
+        # 3. Run ACE pipeline
+        print(f"   Running ACE pipeline (this may take 30-120 seconds for LLM processing)...")
+        pipeline_start = time.time()
+        
+        pipeline_result = await loop.run_in_executor(
+            _ACE_RUN_EXECUTOR,
+            lambda: _ace_pipeline.run(
+                product_data=product_serialized,
+                image_analysis=image_analysis,
+                business_objective=business_objective,
+                feedback=None
+            )
+        )
+        pipeline_duration = time.time() - pipeline_start
+        print(f"   ✅ ACE pipeline.run() completed in {pipeline_duration:.1f}s")
+        
+        # 4. Extract results
+        if hasattr(pipeline_result, 'to_dict'):
+            result_dict = pipeline_result.to_dict()
+            generator_output = result_dict.get("generator_output", {})
+            reflector_output = result_dict.get("reflector_output", {})
+        else:
+            generator_output = pipeline_result if isinstance(pipeline_result, dict) else {}
+            reflector_output = {}
+        scores = generator_output.get("scores") or {}
+        analysis = generator_output.get("analysis") or {}
+        gtm = generator_output.get("go_to_market_recommendations") or {}
+        
+        # 5. Collect competitor intelligence started after the product lookup
+        competitor_intelligence = await competitor_future
+    except BaseException:
+        # The run failed before the lookup was collected: cancel it so a
+        # queued job never starts (a running worker thread cannot be
+        # interrupted, but its result is dropped), or retrieve the error of
+        # one that already failed so it isn't reported as unhandled
+        if not competitor_future.cancel() and not competitor_future.cancelled():
+            competitor_future.exception()
+        raise
+    
+    # 6. Generate marketing strategy
     print(f"   Generating marketing strategy...")
     marketing_start = time.time()
     marketing_strategy = generate_marketing_strategy(
         product_data=product_serialized,
-        scoring_results=generator_output.get("scores", {}),
+        scoring_results=scores,
         competitor_intelligence=competitor_intelligence,
         business_objective=business_objective
     )
     marketing_duration = time.time() - marketing_start
     print(f"   ✅ Marketing strategy generated in {marketing_duration:.1f}s")
     
-    # 8. Generate research insights
+    # 7. Generate research insights
     print(f"   Generating research insights...")
     research_start = time.time()
     research_insights = generate_research_insights(
@@ -157,29 +263,7 @@ async def run_ace_analysis(
     research_duration = time.time() - research_start
     print(f"   ✅ Research insights generated in {research_duration:.1f}s")
     
-    # 9. Build complete result (similar to old api.py format)
-    from datetime import datetime
-    import re
-    
-    def _format_key_insights(key_insights):
-        """Format key_insights from string to list."""
-        if not key_insights:
-            return []
-        if isinstance(key_insights, list):
-            return key_insights
-        if isinstance(key_insights, str):
-            if '\n' in key_insights:
-                lines = [line.strip() for line in key_insights.split('\n') if line.strip() and not line.strip().startswith('#')]
-                cleaned = []
-                for line in lines:
-                    line = line.lstrip('0123456789.-) ')
-                    line = line.lstrip('•-* ')
-                    if line:
-                        cleaned.append(line)
-                return cleaned if cleaned else [key_insights]
-            return [key_insights]
-        return []
-    
+    # 8. Build complete result (similar to old api.py format)
     result = {
         "export_metadata": {
             "export_date": datetime.now().isoformat(),
@@ -217,24 +301,24 @@ async def run_ace_analysis(
         "scoring_results": {
             "confidence_level": generator_output.get("confidence", "medium"),
             "scores": {
-                "attractiveness_score": generator_output.get("scores", {}).get("attractiveness_score", 0),
-                "utility_score": generator_output.get("scores", {}).get("utility_score", 0),
-                "positioning_score": generator_output.get("scores", {}).get("positioning_score", 0),
-                "global_score": generator_output.get("scores", {}).get("global_score", 0)
+                "attractiveness_score": scores.get("attractiveness_score", 0),
+                "utility_score": scores.get("utility_score", 0),
+                "positioning_score": scores.get("positioning_score", 0),
+                "global_score": scores.get("global_score", 0)
             },
             "criteria_breakdown": generator_output.get("criteria", {})
         },
         "evidence_based_explanations": generator_output.get("explanations", {}),
         "swot_analysis": {
-            "strengths": generator_output.get("analysis", {}).get("strengths", []),
-            "weaknesses": generator_output.get("analysis", {}).get("weaknesses", []),
-            "risks": generator_output.get("analysis", {}).get("risks", [])
+            "strengths": analysis.get("strengths", []),
+            "weaknesses": analysis.get("weaknesses", []),
+            "risks": analysis.get("risks", [])
         },
         "packaging_improvement_proposals": generator_output.get("packaging_improvement_proposals", []),
         "go_to_market_strategy": {
-            "shelf_positioning": generator_output.get("go_to_market_recommendations", {}).get("shelf_positioning", ""),
-            "b2b_targeting": generator_output.get("go_to_market_recommendations", {}).get("b2b_targeting", ""),
-            "regional_relevance": generator_output.get("go_to_market_recommendations", {}).get("regional_relevance", "")
+            "shelf_positioning": gtm.get("shelf_positioning", ""),
+            "b2b_targeting": gtm.get("b2b_targeting", ""),
+            "regional_relevance": gtm.get("regional_relevance", "")
         },
         "quality_insights": {
             "reflector_analysis": reflector_output.get("analysis", "") if reflector_output else "",
@@ -5,6 +5,7 @@ Runs EssenceAI pipeline internally (no HTTP calls).
 
 import os
 import sys
+import asyncio
 from pathlib import Path
 from typing import Dict, Any, Optional
 
@@ -117,8 +118,10 @@ async def run_essence_analysis(
     else:
         product_desc = product_description
     
-    # Execute full analysis
-    result = _essence_orchestrator.execute_full_analysis(
+    # Execute full analysis on a worker thread so concurrent callers overlap;
+    # the agents only share the competitor caches, which are lock-guarded
+    result = await asyncio.to_thread(
+        _essence_orchestrator.execute_full_analysis,
         product_description=product_desc,
         domain=domain,
         segment=segment
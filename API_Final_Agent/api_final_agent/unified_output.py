@@ -7,19 +7,51 @@ GUARANTEES ZERO INFORMATION LOSS - all fields preserved.
 from typing import Dict, Any, Optional, List
 from datetime import datetime
 import copy
+import re
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-def extract_all_keys(data: Any, prefix: str = "") -> set:
-    """Extract all keys from nested structure."""
+
+def _isolated_copy(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Deep copy of a JSON-shaped result.
+    
+    An orjson serialize/parse round trip is much faster than copy.deepcopy;
+    values orjson cannot represent fall back to deepcopy.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS))
+        except TypeError:
+            pass
+    return copy.deepcopy(data)
+
+
+def extract_all_keys(data: Any, prefix: str = "", max_depth: Optional[int] = None) -> set:
+    """
+    Extract all keys from nested structure.
+    
+    Lists are followed through their first item only. With `max_depth`,
+    nesting below that many levels is not explored.
+    """
     keys = set()
-    if isinstance(data, dict):
-        for key, value in data.items():
-            current_path = f"{prefix}.{key}" if prefix else key
-            keys.add(current_path)
-            keys.update(extract_all_keys(value, current_path))
-    elif isinstance(data, list) and data:
-        for i, item in enumerate(data[:1]):  # Check first item only
-            keys.update(extract_all_keys(item, f"{prefix}[0]"))
+    stack = [(data, prefix, 0)]
+    while stack:
+        obj, path, depth = stack.pop()
+        if max_depth is not None and depth >= max_depth:
+            continue
+        if isinstance(obj, dict):
+            for key, value in obj.items():
+                current_path = f"{path}.{key}" if path else key
+                keys.add(current_path)
+                if isinstance(value, (dict, list)):
+                    stack.append((value, current_path, depth + 1))
+        elif isinstance(obj, list) and obj:
+            # Check first item only
+            stack.append((obj[0], f"{path}[0]", depth + 1))
     return keys
 
 
@@ -39,55 +71,91 @@ def generate_visualizations(data: Dict[str, Any]) -> List[Dict[str, Any]]:
         return detect_visuals(data)
 
 
-def detect_visuals(data: Dict[str, Any]) -> List[Dict[str, Any]]:
-    """Detect visual artifacts in data."""
-    visuals = []
+# Key fragments that mark a field as holding a visual ("visualization" and
+# "plotly" are covered by "visual" and "plot"); matched against lowered keys
+_VISUAL_KEY_RE = re.compile(r'chart|plot|graph|visual|figure|diagram|image|matplotlib')
+
+# How raw base64 PNG, JPEG, GIF and WebP payloads (and other data URLs) start
+_BASE64_IMAGE_PREFIXES = ('iVBOR', '/9j/', 'R0lGOD', 'UklGR', 'data:')
+
+
+def _scan_visuals(data: Any, find_plotly: bool = False):
+    """
+    Walk data once, returning (detected_visuals, plotly_charts).
     
-    def search_visuals(obj: Any, path: str = ""):
+    Detection follows the first 3 items of lists and plotly search the
+    first 5; both lists come out in depth-first order. The walk uses an
+    explicit stack rather than recursion.
+    """
+    visuals = []
+    plotly_charts = []
+    list_limit = 5 if find_plotly else 3
+    # (value, path, key it was found under, still within detection scope)
+    stack = [(data, "", None, True)]
+    while stack:
+        obj, path, key, detect = stack.pop()
+        
+        if detect and key is not None:
+            lowered = key.lower()
+            # Check for visual-related keys
+            if _VISUAL_KEY_RE.search(lowered):
+                if isinstance(obj, (str, dict, list)):
+                    visuals.append({
+                        "path": path,
+                        "title": key,
+                        "type": "detected_visual",
+                        "format": "unknown"
+                    })
+            
+            # Check for base64 images
+            if isinstance(obj, str):
+                if obj.startswith('data:image/'):
+                    visuals.append({
+                        "path": path,
+                        "title": key,
+                        "type": "base64_image",
+                        "format": obj.split(';')[0].split(':')[1] if ':' in obj else "image",
+                        "data_or_url": obj[:100] + "..." if len(obj) > 100 else obj
+                    })
+                elif 'image' in lowered and len(obj) > 500 and obj.startswith(_BASE64_IMAGE_PREFIXES):
+                    # Potential base64
+                    visuals.append({
+                        "path": path,
+                        "title": key,
+                        "type": "potential_base64",
+                        "format": "unknown"
+                    })
+        
         if isinstance(obj, dict):
-            for key, value in obj.items():
-                current_path = f"{path}.{key}" if path else key
-                
-                # Check for visual-related keys
-                visual_keywords = ['chart', 'plot', 'graph', 'visual', 'figure', 'diagram', 
-                                 'image', 'visualization', 'plotly', 'matplotlib']
-                if any(kw in key.lower() for kw in visual_keywords):
-                    if isinstance(value, (str, dict, list)):
-                        visuals.append({
-                            "path": current_path,
-                            "title": key,
-                            "type": "detected_visual",
-                            "format": "unknown"
-                        })
-                
-                # Check for base64 images
-                if isinstance(value, str):
-                    if value.startswith('data:image/'):
-                        visuals.append({
-                            "path": current_path,
-                            "title": key,
-                            "type": "base64_image",
-                            "format": value.split(';')[0].split(':')[1] if ':' in value else "image",
-                            "data_or_url": value[:100] + "..." if len(value) > 100 else value
-                        })
-                    elif len(value) > 500 and value[:50].isalnum():
-                        # Potential base64
-                        if 'image' in key.lower():
-                            visuals.append({
-                                "path": current_path,
-                                "title": key,
-                                "type": "potential_base64",
-                                "format": "unknown"
-                            })
-                
-                search_visuals(value, current_path)
+            # Check for plotly-like structures
+            if find_plotly and "data" in obj and "layout" in obj:
+                plotly_charts.append({
+                    "path": path,
+                    "title": obj.get("layout", {}).get("title", {}).get("text", "Chart"),
+                    "type": "plotly_chart",
+                    "format": "plotly_json",
+                    "data_or_url": path
+                })
+            # Reversed so children pop in their original order
+            for child_key, value in reversed(obj.items()):
+                if detect or isinstance(value, (dict, list)):
+                    stack.append((value, f"{path}.{child_key}" if path else child_key, child_key, detect))
         
         elif isinstance(obj, list):
-            for i, item in enumerate(obj[:3]):  # Check first 3 items
-                search_visuals(item, f"{path}[{i}]")
+            for i in range(min(len(obj), list_limit) - 1, -1, -1):
+                stack.append((obj[i], f"{path}[{i}]", None, detect and i < 3))
     
-    search_visuals(data)
-    return visuals
+    return visuals, plotly_charts
+
+
+def detect_visuals(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Detect visual artifacts in data."""
+    return _scan_visuals(data)[0]
+
+
+def find_plotly_data(data: Any) -> List[Dict[str, Any]]:
+    """Find plotly-like chart structures (dicts with "data" and "layout") in data."""
+    return _scan_visuals(data, find_plotly=True)[1]
 
 
 def deep_merge_dicts(dict1: Dict[str, Any], dict2: Dict[str, Any], 
@@ -98,49 +166,68 @@ def deep_merge_dicts(dict1: Dict[str, Any], dict2: Dict[str, Any],
     """
     result = {}
     
-    # Get all keys from both dicts
-    all_keys = set(dict1.keys()) | set(dict2.keys())
-    
-    for key in all_keys:
-        val1 = dict1.get(key)
-        val2 = dict2.get(key)
-        
-        if key not in dict1:
-            # Only in dict2
-            result[key] = {"source": source2, "value": val2}
-        elif key not in dict2:
+    # Keys of dict1 (shared or not), in order, without building key sets
+    for key, val1 in dict1.items():
+        if key not in dict2:
             # Only in dict1
             result[key] = {"source": source1, "value": val1}
+            continue
+        val2 = dict2[key]
+        # In both - check if mergeable
+        if isinstance(val1, dict) and isinstance(val2, dict):
+            # Recursive merge
+            result[key] = deep_merge_dicts(val1, val2, source1, source2)
+        elif isinstance(val1, list) and isinstance(val2, list):
+            # Combine lists, keeping every item with its source
+            result[key] = [{"source": source1, "value": v} for v in val1] + \
+                [{"source": source2, "value": v} for v in val2]
         else:
-            # In both - check if mergeable
-            if isinstance(val1, dict) and isinstance(val2, dict):
-                # Recursive merge
-                result[key] = deep_merge_dicts(val1, val2, source1, source2)
-            elif isinstance(val1, list) and isinstance(val2, list):
-                # Combine lists, deduplicate if possible
-                combined = [{"source": source1, "value": v} for v in val1]
-                combined.extend([{"source": source2, "value": v} for v in val2])
-                result[key] = combined
-            else:
-                # Conflict - keep both
-                result[key] = {
-                    "sources": [source1, source2],
-                    "values": {
-                        source1: val1,
-                        source2: val2
-                    }
+            # Conflict - keep both
+            result[key] = {
+                "sources": [source1, source2],
+                "values": {
+                    source1: val1,
+                    source2: val2
                 }
+            }
+    
+    # Keys only in dict2
+    for key, val2 in dict2.items():
+        if key not in dict1:
+            result[key] = {"source": source2, "value": val2}
     
     return result
 
 
+# ACE fields copied into merged unchanged
+_ACE_DIRECT_COPY_KEYS = frozenset({
+    "product_information", "scoring_results", "image_analysis",
+    "evidence_based_explanations", "quality_insights", "export_metadata"
+})
+
+# Every ACE field create_unified_output places itself; the rest are kept as ace_<key>
+_ACE_HANDLED_KEYS = _ACE_DIRECT_COPY_KEYS | {
+    "image_front_url", "business_objective", "swot_analysis",
+    "packaging_improvement_proposals", "go_to_market_strategy",
+    "competitor_intelligence", "marketing_strategy", "research_insights"
+}
+
+# Essence fields create_unified_output places itself; the rest are kept as essence_<key>
+_HANDLED_ESSENCE_KEYS = frozenset({
+    "competitor_analysis", "research_insights", "marketing_strategy",
+    "workflow", "input", "status", "message", "mock_data",
+    "competitor_intelligence", "marketing_strategy_essence", "research_insights_essence"
+})
+
+
 def create_unified_output(
     analysis_id: str,
     input_data: Dict[str, Any],
     ace_result: Optional[Dict[str, Any]],
     essence_result: Optional[Dict[str, Any]],
     status: str,
-    errors: List[Dict[str, Any]]
+    errors: List[Dict[str, Any]],
+    deep_copy: bool = False
 ) -> Dict[str, Any]:
     """
     Create unified output JSON from ACE and Essence results.
@@ -158,6 +245,8 @@ def create_unified_output(
         essence_result: Essence pipeline result
         status: ok/partial/error
         errors: List of errors
+        deep_copy: Store copies of the results in raw_sources instead of
+            references (only needed if callers mutate the results afterwards)
         
     Returns:
         Complete unified output JSON with zero information loss
@@ -168,8 +257,9 @@ def create_unified_output(
         "status": status,
         "timestamp": datetime.now().isoformat(),
         "raw_sources": {
-            "ace": copy.deepcopy(ace_result) if ace_result else None,
-            "essence": copy.deepcopy(essence_result) if essence_result else None
+            # Nothing below mutates the results, so references suffice
+            "ace": (_isolated_copy(ace_result) if deep_copy else ace_result) if ace_result else None,
+            "essence": (_isolated_copy(essence_result) if deep_copy else essence_result) if essence_result else None
         },
         "errors": errors
     }
@@ -177,28 +267,44 @@ def create_unified_output(
     # Build merged section - preserve ALL information
     merged = {}
     
-    # Extract all keys to ensure nothing is missed
-    ace_keys = extract_all_keys(ace_result) if ace_result else set()
-    essence_keys = extract_all_keys(essence_result) if essence_result else set()
+    # Route every ACE field in one pass: direct copies go straight into
+    # merged, multi-source sections are collected next to their Essence
+    # counterparts, and unhandled fields are kept for the catch-all below
+    objectives = []
+    swot_sources = []
+    improvements = []
+    gtm_strategies = []
+    ace_extra = []
+    for key, value in (ace_result or {}).items():
+        if key in _ACE_DIRECT_COPY_KEYS:
+            merged[key] = value
+        elif key in _ACE_HANDLED_KEYS:
+            if key == "image_front_url":
+                if value:
+                    merged[key] = value
+            elif key == "business_objective":
+                if value:
+                    objective = value.get("objective_description", str(value)) if isinstance(value, dict) else str(value)
+                    objectives.append({"source": "ace", "objective": objective})
+            elif key == "swot_analysis":
+                swot_sources.append({"source": "ace", "analysis": value})
+            elif key == "go_to_market_strategy":
+                gtm_strategies.append({"source": "ace", "strategy": value})
+            elif key == "packaging_improvement_proposals":
+                if isinstance(value, list):
+                    improvements.extend([{"source": "ace", "proposal": p} for p in value])
+                else:
+                    improvements.append({"source": "ace", "proposal": value})
+            # competitor_intelligence, marketing_strategy and research_insights
+            # are combined with the Essence versions further down
+        else:
+            ace_extra.append((key, value))
     
     # Product Information (prioritize ACE, but preserve both if different)
-    if ace_result and "product_information" in ace_result:
-        merged["product_information"] = ace_result["product_information"]
-    elif essence_result and "product_information" in essence_result:
+    if "product_information" not in merged and essence_result and "product_information" in essence_result:
         merged["product_information"] = essence_result["product_information"]
     
-    # Image URL (from ACE)
-    if ace_result and ace_result.get("image_front_url"):
-        merged["image_front_url"] = ace_result["image_front_url"]
-    
     # Business Objective - collect from all sources
-    objectives = []
-    if ace_result and ace_result.get("business_objective"):
-        obj = ace_result["business_objective"]
-        if isinstance(obj, dict):
-            objectives.append({"source": "ace", "objective": obj.get("objective_description", str(obj))})
-        else:
-            objectives.append({"source": "ace", "objective": str(obj)})
     if essence_result and essence_result.get("business_objective"):
         objectives.append({"source": "essence", "objective": essence_result["business_objective"]})
     if input_data.get("business_objective"):
@@ -208,17 +314,7 @@ def create_unified_output(
     if objectives:
         merged["business_objectives"] = objectives
     
-    # Scoring Results (from ACE)
-    if ace_result and "scoring_results" in ace_result:
-        merged["scoring_results"] = ace_result["scoring_results"]
-    
     # SWOT Analysis - preserve all sources
-    swot_sources = []
-    if ace_result and "swot_analysis" in ace_result:
-        swot_sources.append({
-            "source": "ace",
-            "analysis": ace_result["swot_analysis"]
-        })
     if essence_result and "swot_analysis" in essence_result:
         swot_sources.append({
             "source": "essence",
@@ -227,18 +323,7 @@ def create_unified_output(
     if swot_sources:
         merged["swot_analysis"] = swot_sources
     
-    # Image Analysis (from ACE)
-    if ace_result and "image_analysis" in ace_result:
-        merged["image_analysis"] = ace_result["image_analysis"]
-    
     # Packaging Improvements - preserve all sources
-    improvements = []
-    if ace_result and "packaging_improvement_proposals" in ace_result:
-        ace_improvements = ace_result["packaging_improvement_proposals"]
-        if isinstance(ace_improvements, list):
-            improvements.extend([{"source": "ace", "proposal": p} for p in ace_improvements])
-        else:
-            improvements.append({"source": "ace", "proposal": ace_improvements})
     if essence_result and "packaging_improvements" in essence_result:
         essence_improvements = essence_result["packaging_improvements"]
         if isinstance(essence_improvements, list):
@@ -249,12 +334,6 @@ def create_unified_output(
         merged["packaging_improvements"] = improvements
     
     # Go-to-Market Strategy - preserve all sources
-    gtm_strategies = []
-    if ace_result and "go_to_market_strategy" in ace_result:
-        gtm_strategies.append({
-            "source": "ace",
-            "strategy": ace_result["go_to_market_strategy"]
-        })
     if essence_result and "go_to_market_strategy" in essence_result:
         gtm_strategies.append({
             "source": "essence",
@@ -263,18 +342,6 @@ def create_unified_output(
     if gtm_strategies:
         merged["go_to_market_strategies"] = gtm_strategies
     
-    # Evidence-Based Explanations (from ACE)
-    if ace_result and "evidence_based_explanations" in ace_result:
-        merged["evidence_based_explanations"] = ace_result["evidence_based_explanations"]
-    
-    # Quality Insights (from ACE)
-    if ace_result and "quality_insights" in ace_result:
-        merged["quality_insights"] = ace_result["quality_insights"]
-    
-    # Export Metadata (from ACE)
-    if ace_result and "export_metadata" in ace_result:
-        merged["export_metadata"] = ace_result["export_metadata"]
-    
     # EssenceAI-specific fields - preserve ALL
     if essence_result:
         # Competitor Analysis
@@ -318,39 +385,16 @@ def create_unified_output(
     except Exception as e:
         print(f"Warning: Could not generate visualizations: {e}")
     
-    # Also detect any existing visuals in the results
+    # Also detect any existing visuals and plotly chart data structures in
+    # the results (one walk serves both)
     if essence_result:
-        essence_visuals = detect_visuals(essence_result)
-        if essence_visuals:
-            # Avoid duplicates
-            existing_titles = {v.get("title") for v in visuals}
-            for v in essence_visuals:
-                if v.get("title") not in existing_titles:
-                    visuals.append(v)
-    
-    # Also check for any plotly chart data structures
-    if essence_result:
-        def find_plotly_data(obj: Any, path: str = ""):
-            found = []
-            if isinstance(obj, dict):
-                # Check for plotly-like structures
-                if "data" in obj and "layout" in obj:
-                    found.append({
-                        "path": path,
-                        "title": obj.get("layout", {}).get("title", {}).get("text", "Chart"),
-                        "type": "plotly_chart",
-                        "format": "plotly_json",
-                        "data_or_url": path
-                    })
-                for key, value in obj.items():
-                    found.extend(find_plotly_data(value, f"{path}.{key}" if path else key))
-            elif isinstance(obj, list):
-                for i, item in enumerate(obj[:5]):
-                    found.extend(find_plotly_data(item, f"{path}[{i}]"))
-            return found
-        
-        plotly_charts = find_plotly_data(essence_result)
+        essence_visuals, plotly_charts = _scan_visuals(essence_result, find_plotly=True)
+        # Avoid duplicates: detected visuals are checked against the generated
+        # ones, plotly charts against both
         existing_titles = {v.get("title") for v in visuals}
+        detected = [v for v in essence_visuals if v.get("title") not in existing_titles]
+        visuals.extend(detected)
+        existing_titles.update(v.get("title") for v in detected)
         for chart in plotly_charts:
             if chart.get("title") not in existing_titles:
                 visuals.append(chart)
@@ -412,19 +456,9 @@ def create_unified_output(
             }
     
     # Preserve ALL other fields from ACE that weren't explicitly handled
-    if ace_result:
-        handled_ace_keys = {
-            "product_information", "image_front_url", "business_objective",
-            "scoring_results", "swot_analysis", "image_analysis",
-            "packaging_improvement_proposals", "go_to_market_strategy",
-            "evidence_based_explanations", "quality_insights", "export_metadata",
-            "competitor_intelligence",  # Now handled above
-            "marketing_strategy",  # Now handled above
-            "research_insights"  # Now handled above
-        }
-        for key, value in ace_result.items():
-            if key not in handled_ace_keys and key not in merged:
-                merged[f"ace_{key}"] = value
+    for key, value in ace_extra:
+        if key not in merged:
+            merged[f"ace_{key}"] = value
     
     # Extract and structure Essence data for frontend
     if essence_result and essence_result.get("status") != "mock":
@@ -474,13 +508,8 @@ def create_unified_output(
     
     # Preserve ALL other fields from Essence that weren't explicitly handled
     if essence_result:
-        handled_essence_keys = {
-            "competitor_analysis", "research_insights", "marketing_strategy",
-            "workflow", "input", "status", "message", "mock_data",
-            "competitor_intelligence", "marketing_strategy_essence", "research_insights_essence"
-        }
         for key, value in essence_result.items():
-            if key not in handled_essence_keys and key not in merged:
+            if key not in _HANDLED_ESSENCE_KEYS and key not in merged:
                 merged[f"essence_{key}"] = value
     
     unified["merged"] = merged
@@ -3,9 +3,134 @@ JSON Serialization Helper
 Converts Pydantic models and other objects to JSON-serializable format
 """
 
-from typing import Any, Dict, List
+import json
+from typing import Any, Dict, FrozenSet, List, Tuple
 from datetime import datetime, date
 from enum import Enum
+from functools import lru_cache
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Parses JSON text or UTF-8 bytes. orjson.JSONDecodeError subclasses
+# json.JSONDecodeError, so callers catch the same error either way
+json_loads = orjson.loads if orjson is not None else json.loads
+
+
+# Exact types returned as-is without further checks
+_EXACT_PRIMITIVES = frozenset({type(None), bool, int, float, str})
+
+# How _resolve classifies an object
+_LEAF, _SEQUENCE, _MAPPING = 0, 1, 2
+
+# Conversion methods tried in order: Pydantic v2, Pydantic v1, to_dict()
+_CONVERSION_METHODS = ('model_dump', 'dict', 'to_dict')
+
+
+@lru_cache(maxsize=1024)
+def _class_conversion_methods(cls: type) -> Tuple[FrozenSet[str], bool]:
+    """
+    Conversion methods a class defines, and whether its attributes are dynamic.
+    
+    Classes with __getattr__ or a custom __getattribute__ can answer for
+    names they do not define, so their instances are still probed one by one.
+    """
+    dynamic = hasattr(cls, '__getattr__') or cls.__getattribute__ is not object.__getattribute__
+    return frozenset(name for name in _CONVERSION_METHODS if hasattr(cls, name)), dynamic
+
+
+def _has_conversion_method(obj: Any, name: str, class_methods: FrozenSet[str], dynamic: bool) -> bool:
+    """hasattr(obj, name), answered from the per-class lookup where possible."""
+    if name in class_methods:
+        return True
+    if dynamic:
+        return hasattr(obj, name)
+    # Methods can also be assigned on the instance itself
+    instance_attrs = getattr(obj, '__dict__', None)
+    return instance_attrs is not None and name in instance_attrs
+
+
+def _resolve(obj: Any):
+    """
+    Classify one object for make_json_serializable.
+    
+    Returns (_LEAF, value) for finished values, (_SEQUENCE, items) for
+    containers converted to lists and (_MAPPING, pairs) for containers
+    converted to dicts. Children are not visited here.
+    """
+    while True:
+        # Plain containers first: they define none of the conversion methods
+        cls = type(obj)
+        if cls is dict:
+            return _MAPPING, [(str(key), value) for key, value in obj.items()]
+        if cls is list or cls is tuple:
+            return _SEQUENCE, obj
+        
+        # None, bool, int, float, str are already serializable
+        if obj is None or isinstance(obj, (bool, int, float, str)):
+            return _LEAF, obj
+        
+        # Datetime objects
+        if isinstance(obj, (datetime, date)):
+            return _LEAF, obj.isoformat()
+        
+        # Enums
+        if isinstance(obj, Enum):
+            return _LEAF, obj.value
+        
+        class_methods, dynamic = _class_conversion_methods(cls)
+        converted = False
+        for name in _CONVERSION_METHODS:
+            if not _has_conversion_method(obj, name, class_methods, dynamic):
+                continue
+            method = getattr(obj, name, None)
+            if name == 'model_dump':
+                # Pydantic v2 models
+                if method is None:
+                    continue
+            elif not callable(method):
+                continue
+            try:
+                result = method()
+            except Exception:
+                continue
+            if name != 'to_dict':
+                # Pydantic model dumps are already plain data
+                return _LEAF, result
+            # Objects with to_dict method: serialize the result in their place
+            if result is not obj:
+                obj = result
+                converted = True
+            break
+        if converted:
+            continue
+        
+        # Lists, tuples, sets
+        if isinstance(obj, (list, tuple, set)):
+            return _SEQUENCE, obj
+        
+        # Dictionaries
+        if isinstance(obj, dict):
+            return _MAPPING, [(str(key), value) for key, value in obj.items()]
+        
+        # Objects with __dict__
+        if hasattr(obj, '__dict__'):
+            try:
+                return _MAPPING, [
+                    (key, value)
+                    for key, value in obj.__dict__.items()
+                    if not key.startswith('_')  # Skip private attributes
+                ]
+            except Exception:
+                pass
+        
+        # Last resort: convert to string
+        try:
+            return _LEAF, str(obj)
+        except Exception:
+            return _LEAF, f"<non-serializable: {type(obj).__name__}>"
 
 
 def make_json_serializable(obj: Any) -> Any:
@@ -23,82 +148,88 @@ def make_json_serializable(obj: Any) -> Any:
     - Enums
     - Primitives
     
+    Nested containers are converted with an explicit stack rather than
+    recursion, so arbitrarily deep inputs cannot hit the recursion limit.
+    
     Args:
         obj: Object to convert
         
     Returns:
         JSON-serializable version of the object
     """
-    # None, bool, int, float, str are already serializable
-    if obj is None or isinstance(obj, (bool, int, float, str)):
+    if type(obj) in _EXACT_PRIMITIVES:
         return obj
     
-    # Datetime objects
-    if isinstance(obj, (datetime, date)):
-        return obj.isoformat()
-    
-    # Enums
-    if isinstance(obj, Enum):
-        return obj.value
-    
-    # Pydantic v2 models
-    if hasattr(obj, 'model_dump'):
-        try:
-            return obj.model_dump()
-        except Exception:
-            pass
-    
-    # Pydantic v1 models
-    if hasattr(obj, 'dict') and callable(obj.dict):
-        try:
-            return obj.dict()
-        except Exception:
-            pass
-    
-    # Objects with to_dict method
-    if hasattr(obj, 'to_dict') and callable(obj.to_dict):
-        try:
-            result = obj.to_dict()
-            # Recursively serialize the result
-            return make_json_serializable(result)
-        except Exception:
-            pass
-    
-    # Lists, tuples, sets
-    if isinstance(obj, (list, tuple, set)):
-        return [make_json_serializable(item) for item in obj]
-    
-    # Dictionaries
-    if isinstance(obj, dict):
-        return {
-            str(key): make_json_serializable(value) 
-            for key, value in obj.items()
-        }
+    holder = [None]
+    # (output container, slot in it, object to convert into that slot)
+    stack = [(holder, 0, obj)]
+    pop = stack.pop
+    push = stack.append
+    while stack:
+        parent, slot, item = pop()
+        if type(item) in _EXACT_PRIMITIVES:
+            parent[slot] = item
+            continue
+        
+        kind, value = _resolve(item)
+        if kind == _LEAF:
+            parent[slot] = value
+        elif kind == _SEQUENCE:
+            items = list(value)
+            out = [None] * len(items)
+            parent[slot] = out
+            for i in range(len(items) - 1, -1, -1):
+                push((out, i, items[i]))
+        else:
+            out = {}
+            parent[slot] = out
+            # Reversed so keys are inserted in their original order
+            for key, child in reversed(value):
+                push((out, key, child))
     
-    # Objects with __dict__
-    if hasattr(obj, '__dict__'):
-        try:
-            return {
-                key: make_json_serializable(value)
-                for key, value in obj.__dict__.items()
-                if not key.startswith('_')  # Skip private attributes
-            }
-        except Exception:
-            pass
+    return holder[0]
+
+
+def _orjson_default(obj: Any) -> Any:
+    """orjson hook: convert one object exactly as make_json_serializable would."""
+    kind, value = _resolve(obj)
+    if kind == _SEQUENCE:
+        return list(value)
+    if kind == _MAPPING:
+        return dict(value)
+    return value
+
+
+# Everything orjson would otherwise encode its own way (dataclass fields,
+# dict/str/int subclasses, datetimes) is handed to _orjson_default instead
+_ORJSON_OPTIONS = (
+    orjson.OPT_PASSTHROUGH_DATACLASS
+    | orjson.OPT_PASSTHROUGH_SUBCLASS
+    | orjson.OPT_PASSTHROUGH_DATETIME
+) if orjson is not None else 0
+
+
+def _orjson_round_trip(obj: Any) -> Any:
+    """
+    Normalize obj with one orjson encode/decode pass.
     
-    # Last resort: convert to string
-    try:
-        return str(obj)
-    except Exception:
-        return f"<non-serializable: {type(obj).__name__}>"
+    Raises TypeError when the fast path cannot reproduce make_json_serializable:
+    orjson rejects the object (non-str keys, ints wider than 64 bits, ...) or
+    the output contains null, which is also how orjson writes NaN/Infinity.
+    """
+    encoded = orjson.dumps(obj, default=_orjson_default, option=_ORJSON_OPTIONS)
+    if b"null" in encoded:
+        raise TypeError("null in orjson output; NaN/Infinity cannot be told apart from None")
+    return orjson.loads(encoded)
 
 
 def safe_json_dump(obj: Any) -> Dict[str, Any]:
     """
     Safely convert an object to a JSON-serializable dictionary.
     
-    This is a convenience wrapper around make_json_serializable
-    that ensures the result is always a dictionary.
+    Uses a single orjson round trip when orjson is installed and it gives
+    the same result as make_json_serializable; otherwise falls back to
+    make_json_serializable. Ensures the result is always a dictionary.
     
     Args:
         obj: Object to convert
@@ -106,9 +237,45 @@ def safe_json_dump(obj: Any) -> Dict[str, Any]:
     Returns:
         JSON-serializable dictionary
     """
-    result = make_json_serializable(obj)
+    result = None
+    if orjson is not None:
+        try:
+            result = _orjson_round_trip(obj)
+        except TypeError:
+            result = None
+    if result is None:
+        result = make_json_serializable(obj)
     
     if isinstance(result, dict):
         return result
     else:
         return {"value": result}
+
+
+def dumps_compact(obj: Any) -> bytes:
+    """
+    Serialize JSON-shaped data to compact UTF-8 bytes.
+    
+    Same fallback rules as dumps_indented.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def dumps_indented(obj: Any) -> bytes:
+    """
+    Pretty-print JSON-shaped data as UTF-8 bytes with a 2-space indent.
+    
+    Uses orjson when it is installed and accepts the data; values it
+    rejects (ints wider than 64 bits, ...) are written with json instead.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            pass
+    return json.dumps(obj, indent=2, ensure_ascii=False).encode('utf-8')
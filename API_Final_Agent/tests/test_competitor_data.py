@@ -0,0 +1,80 @@
+"""Tests for Essence competitor intelligence parsing"""
+import json
+
+from api_final_agent.essence.competitor_data import OptimizedCompetitorIntelligence, _ArrayObjectScanner
+
+
+def _extract(results, max_results=5):
+    intel = object.__new__(OptimizedCompetitorIntelligence)
+    return intel._extract_heuristically(results, max_results)
+
+
+def test_heuristic_extraction_reads_company_from_domain_matching_title():
+    competitors = _extract([{
+        'title': 'Beyond Burger | Beyond Meat',
+        'content': 'Sold at 14,50 €/kg with a footprint of 3.1 kg CO2e',
+        'url': 'https://www.beyondmeat.com/products/beyond-burger',
+    }])
+    assert competitors == [{
+        'Company': 'Beyond Meat',
+        'Product': 'Beyond Burger',
+        'Price (€/kg)': 14.5,
+        'CO₂ (kg)': 3.1,
+        'Marketing Claim': 'N/A',
+        'Source': 'https://www.beyondmeat.com/products/beyond-burger',
+    }]
+
+
+def test_heuristic_extraction_skips_pages_not_owned_by_a_company():
+    assert _extract([{
+        'title': 'Best vegan cheeses of 2024 - Blog',
+        'content': 'Prices from €12/kg, about 2 kg CO2 per kg',
+        'url': 'https://veganblog.com/best-cheeses',
+    }]) == []
+
+
+def test_heuristic_extraction_requires_co2_figure():
+    assert _extract([{
+        'title': 'Oatly Barista - Oatly',
+        'content': 'Only €3/kg',
+        'url': 'https://www.oatly.com/barista',
+    }]) == []
+
+
+def _scan(*chunks):
+    scanner = _ArrayObjectScanner()
+    return [obj for chunk in chunks for obj in scanner.feed(chunk)]
+
+
+def test_scanner_ignores_braces_inside_strings():
+    payload = '[{"Company": "A}{B", "Claim": "{not an object}"}, {"Company": "C"}]'
+    assert [json.loads(obj) for obj in _scan(payload)] == [
+        {"Company": "A}{B", "Claim": "{not an object}"},
+        {"Company": "C"},
+    ]
+
+
+def test_scanner_handles_escaped_quotes():
+    payload = r'[{"Claim": "say \"}{\" twice", "Path": "C:\\"}, {"n": 1}]'
+    assert [json.loads(obj) for obj in _scan(payload)] == [
+        {"Claim": 'say "}{" twice', "Path": "C:\\"},
+        {"n": 1},
+    ]
+
+
+def test_scanner_reports_objects_split_across_chunks():
+    payload = r'[{"Company": "A}{", "Nested": {"x": [1, 2]}}, {"Company": "B\\"}]'
+    chunks = [payload[i:i + 3] for i in range(0, len(payload), 3)]
+    assert [json.loads(obj) for obj in _scan(*chunks)] == [
+        {"Company": "A}{", "Nested": {"x": [1, 2]}},
+        {"Company": "B\\"},
+    ]
+
+
+def test_scanner_does_not_report_an_incomplete_last_object():
+    assert _scan('[{"Company": "A"}, {"Company": "B}', ', "Price') == ['{"Company": "A"}']
+
+
+def test_scanner_waits_for_the_array_to_open():
+    assert _scan('Here you go: {"note": "x"}\n[{"Company": "A"}]') == ['{"Company": "A"}']
+    assert _scan('{"competitors": [{"Company": "A"}]}') == []
@@ -0,0 +1,69 @@
+"""Tests for the Essence SQLite cache"""
+import sqlite3
+import time
+
+from api_final_agent.essence.database import EssenceAIDatabase
+
+
+# competitors table as created before last_updated held Unix seconds
+LEGACY_COMPETITORS_SCHEMA = """
+    CREATE TABLE competitors (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        company_name TEXT NOT NULL,
+        category TEXT NOT NULL,
+        product_type TEXT,
+        price_per_kg REAL,
+        co2_emission REAL,
+        marketing_claim TEXT,
+        source_url TEXT,
+        last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        UNIQUE(company_name, product_type)
+    )
+"""
+
+
+def _legacy_database(path, last_updated):
+    conn = sqlite3.connect(str(path))
+    conn.execute(LEGACY_COMPETITORS_SCHEMA)
+    conn.execute(
+        "INSERT INTO competitors (company_name, category, product_type, last_updated) VALUES (?, ?, ?, ?)",
+        ("Legacy Co", "burger", "patty", last_updated)
+    )
+    conn.commit()
+    conn.close()
+
+
+def test_text_timestamps_are_migrated_to_unix_seconds(tmp_path):
+    path = tmp_path / "essenceai.db"
+    _legacy_database(path, "2024-01-02 03:04:05")
+
+    with EssenceAIDatabase(str(path)) as db:
+        row = db.conn.execute(
+            "SELECT last_updated, typeof(last_updated) AS kind FROM competitors"
+        ).fetchone()
+        assert (row["last_updated"], row["kind"]) == (1704164645, "integer")
+
+
+def test_migrated_rows_follow_freshness_checks(tmp_path):
+    path = tmp_path / "essenceai.db"
+    _legacy_database(path, time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(time.time() - 3600)))
+
+    with EssenceAIDatabase(str(path)) as db:
+        assert [row["company_name"] for row in db.get_competitors("burger", max_age_seconds=7200)] == ["Legacy Co"]
+        assert db.get_competitors("burger", max_age_seconds=60) == []
+
+
+def test_migration_is_idempotent_with_new_rows(tmp_path):
+    path = tmp_path / "essenceai.db"
+    _legacy_database(path, "2024-01-02 03:04:05")
+    EssenceAIDatabase(str(path)).close()
+
+    with EssenceAIDatabase(str(path)) as db:
+        db.add_competitor({"company_name": "New Co", "category": "burger", "product_type": "patty"})
+        rows = db.conn.execute(
+            "SELECT company_name, last_updated, typeof(last_updated) AS kind FROM competitors ORDER BY id"
+        ).fetchall()
+    assert [(row["company_name"], row["kind"]) for row in rows] == [
+        ("Legacy Co", "integer"), ("New Co", "integer")
+    ]
+    assert rows[0]["last_updated"] == 1704164645
@@ -0,0 +1,127 @@
+"""Tests for the JSON serialization helpers"""
+import json
+import math
+from dataclasses import dataclass
+from datetime import date, datetime, time
+from enum import Enum
+
+import pytest
+
+from api_final_agent.utils.json_serializer import (
+    dumps_compact, dumps_indented, json_loads, make_json_serializable, safe_json_dump
+)
+
+
+def _slow_path(obj):
+    result = make_json_serializable(obj)
+    return result if isinstance(result, dict) else {"value": result}
+
+
+class Color(Enum):
+    RED = "red"
+
+
+@dataclass
+class Renamed:
+    a: int
+
+    def to_dict(self):
+        return {"renamed": self.a}
+
+
+@dataclass
+class Plain:
+    a: int
+    _hidden: int = 0
+
+
+class Model:
+    def __init__(self, value):
+        self.value = value
+
+    def model_dump(self):
+        return {"value": self.value}
+
+
+class Attributes:
+    def __init__(self):
+        self.shown = [1, 2]
+        self._hidden = 3
+
+
+class Tagged(dict):
+    def to_dict(self):
+        return {"tagged": True}
+
+
+@pytest.mark.parametrize("obj", [
+    {"a": [1, (2, 3)], "b": {"c": "d"}},
+    {"when": datetime(2020, 1, 2, 3, 4, 5, 6), "day": date(2020, 1, 1), "at": time(3, 4)},
+    {"color": Color.RED, "tags": {"x"}},
+    {"item": Renamed(1)},
+    {"item": Plain(1, 2)},
+    {"model": Model([1, 2])},
+    {"object": Attributes()},
+    {"tagged": Tagged(a=1)},
+    {True: 1, None: 2, 3: "three"},
+    {"nan": float("nan"), "inf": float("inf")},
+    {"none": None},
+    {"big": 2 ** 70},
+    [1, "two"],
+    "text",
+])
+def test_safe_json_dump_matches_make_json_serializable(obj):
+    fast = repr(safe_json_dump(obj))
+    assert fast == repr(_slow_path(obj))
+
+
+def test_safe_json_dump_keeps_nan():
+    assert math.isnan(safe_json_dump({"x": float("nan")})["x"])
+
+
+class Dynamic:
+    def __getattr__(self, name):
+        if name == "to_dict":
+            return lambda: {"dynamic": True}
+        raise AttributeError(name)
+
+
+class PerInstance:
+    def __init__(self):
+        self.to_dict = lambda: {"per_instance": True}
+
+
+def test_conversion_methods_provided_by_getattr_are_used():
+    assert make_json_serializable(Dynamic()) == {"dynamic": True}
+
+
+def test_conversion_methods_assigned_on_the_instance_are_used():
+    assert make_json_serializable(PerInstance()) == {"per_instance": True}
+    # A later instance of the same class without the attribute is unaffected
+    plain = PerInstance()
+    del plain.to_dict
+    assert make_json_serializable(plain) == {}
+
+
+@pytest.mark.parametrize("obj", [
+    {"name": "Café", "values": [1, 2.5, None, True]},
+    {1: "int key", "nested": {"a": []}},
+    {"big": 2 ** 70},
+])
+def test_dumps_indented_matches_json(obj):
+    assert dumps_indented(obj).decode("utf-8") == json.dumps(obj, indent=2, ensure_ascii=False)
+
+
+@pytest.mark.parametrize("obj", [
+    {"name": "Café", "values": [1, 2.5, None, True]},
+    {1: "int key"},
+    {"big": 2 ** 70},
+])
+def test_dumps_compact_matches_json(obj):
+    assert dumps_compact(obj).decode("utf-8") == json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+
+def test_json_loads_accepts_bytes_and_raises_json_errors():
+    assert json_loads(dumps_compact({"a": [1]})) == {"a": [1]}
+    with pytest.raises(json.JSONDecodeError):
+        json_loads(b"{not json")
@@ -0,0 +1,67 @@
+"""Tests for the embedding rate limiter"""
+import pytest
+
+from api_final_agent.essence import rate_limited_embedding
+from api_final_agent.essence.rate_limited_embedding import TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(rate_limited_embedding.time, "monotonic", fake.monotonic)
+    monkeypatch.setattr(rate_limited_embedding.time, "sleep", fake.sleep)
+    return fake
+
+
+def test_burst_goes_out_without_waiting(clock):
+    bucket = TokenBucket(rpm=60, burst=3)
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.sleeps == []
+
+
+def test_waits_for_one_refill_once_burst_is_spent(clock):
+    bucket = TokenBucket(rpm=30, burst=2)
+    bucket.acquire()
+    bucket.acquire()
+    bucket.acquire()
+    # One request refills every 60 / 30 = 2 seconds
+    assert clock.sleeps == [pytest.approx(2.0)]
+
+
+def test_idle_time_refills_up_to_burst(clock):
+    bucket = TokenBucket(rpm=60, burst=2)
+    bucket.acquire()
+    bucket.acquire()
+    clock.now += 3600
+    bucket.acquire()
+    bucket.acquire()
+    assert clock.sleeps == []
+    bucket.acquire()
+    assert clock.sleeps == [pytest.approx(1.0)]
+
+
+def test_waits_for_token_budget(clock):
+    bucket = TokenBucket(rpm=600, tpm=600)
+    bucket.acquire(tokens=600)
+    bucket.acquire(tokens=300)
+    # 300 tokens refill at 10 per second
+    assert sum(clock.sleeps) == pytest.approx(30.0)
+
+
+def test_rejects_non_positive_rate():
+    with pytest.raises(ValueError):
+        TokenBucket(rpm=0)
@@ -0,0 +1,57 @@
+"""Tests for the ACE research insights generator"""
+import pytest
+
+from api_final_agent.ace.research_insights import generate_research_insights
+
+
+PRODUCT = {
+    "plant_based_category": "plant-based-burger",
+    "nutriments": {"proteins_100g": 18, "fiber_100g": 4, "salt_100g": 1.1},
+    "nova_group": 3,
+    "packaging": {"materials": ["cardboard"]},
+}
+SCORING = {"scores": {"global_score": 7.5, "attractiveness_score": 6, "utility_score": 8}}
+COMPETITORS = {"metrics": {"competitor_count": 12, "avg_price_per_kg": 18.0, "avg_co2_emission": 2.0}}
+MARKETING = {"positioning": {"primary": "premium"}}
+
+
+@pytest.mark.parametrize("argument, section", [
+    ("product_data", "nutriments"),
+    ("product_data", "packaging"),
+    ("scoring_results", "scores"),
+    ("competitor_intelligence", "metrics"),
+    ("marketing_strategy", "positioning"),
+])
+def test_none_section_reads_like_missing_section(argument, section):
+    inputs = {
+        "product_data": dict(PRODUCT),
+        "scoring_results": dict(SCORING),
+        "competitor_intelligence": dict(COMPETITORS),
+        "marketing_strategy": dict(MARKETING),
+    }
+    inputs[argument][section] = None
+    with_none = generate_research_insights(**inputs)
+
+    del inputs[argument][section]
+    assert with_none == generate_research_insights(**inputs)
+
+
+def test_results_are_private_to_each_caller():
+    args = (PRODUCT, SCORING, COMPETITORS, MARKETING)
+    first = generate_research_insights(*args)
+    first["consumer_trends"][0]["impact"] = "changed"
+    first["market_dynamics"]["market_size"].clear()
+    first["sustainability_insights"]["packaging_sustainability"]["materials"].append("plastic")
+
+    second = generate_research_insights(*args)
+    assert second is not first
+    assert second["consumer_trends"][0]["impact"] == "High"
+    assert second["market_dynamics"]["market_size"]
+    assert second["sustainability_insights"]["packaging_sustainability"]["materials"] == ["cardboard"]
+    assert PRODUCT["packaging"]["materials"] == ["cardboard"]
+
+
+def test_empty_inputs_return_a_private_result():
+    empty = generate_research_insights({}, {}, {}, {})
+    empty["key_findings"].append("changed")
+    assert "changed" not in generate_research_insights({}, {}, {}, {})["key_findings"]
@@ -5,13 +5,18 @@ Saves raw responses and generates schema reports.
 """
 
 import os
-import json
+import sys
 import requests
 from pathlib import Path
 from typing import Dict, Any, List, Optional
 from datetime import datetime
 import traceback
 
+# Run as a script from the project root; make api_final_agent importable
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from api_final_agent.utils.json_serializer import dumps_indented
+
 # Configuration from environment variables
 ACE_BASE_URL = os.getenv("ACE_BASE_URL", "http://localhost:8001")
 ESSENCE_BASE_URL = os.getenv("ESSENCE_BASE_URL", "http://localhost:8002")
@@ -22,8 +27,7 @@ ARTIFACTS_DIR.mkdir(exist_ok=True)
 def save_json(data: Dict[str, Any], filename: str) -> Path:
     """Save JSON data to artifacts directory."""
     filepath = ARTIFACTS_DIR / filename
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    filepath.write_bytes(dumps_indented(data))
     print(f"✅ Saved: {filepath}")
     return filepath
 
@@ -140,7 +144,7 @@ def generate_schema_report(samples: List[Dict[str, Any]], api_name: str) -> str:
     
     if samples:
         # Show first sample, truncated
-        sample_json = json.dumps(samples[0], indent=2, ensure_ascii=False)
+        sample_json = dumps_indented(samples[0]).decode('utf-8')
         # Truncate if too long
         if len(sample_json) > 2000:
             sample_json = sample_json[:2000] + "\n... (truncated)"
@@ -345,8 +349,7 @@ def run_inspection():
     if ace_samples:
         ace_report = generate_schema_report(ace_samples, "ACE_Framework")
         report_path = ARTIFACTS_DIR / "ace_schema_report.md"
-        with open(report_path, 'w', encoding='utf-8') as f:
-            f.write(ace_report)
+        report_path.write_text(ace_report, encoding='utf-8')
         print(f"✅ Generated: {report_path}")
     else:
         print("⚠️  No ACE samples to analyze")
@@ -354,8 +357,7 @@ def run_inspection():
     if essence_samples:
         essence_report = generate_schema_report(essence_samples, "EssenceAI")
         report_path = ARTIFACTS_DIR / "essence_schema_report.md"
-        with open(report_path, 'w', encoding='utf-8') as f:
-            f.write(essence_report)
+        report_path.write_text(essence_report, encoding='utf-8')
         print(f"✅ Generated: {report_path}")
     else:
         print("⚠️  No EssenceAI samples to analyze")